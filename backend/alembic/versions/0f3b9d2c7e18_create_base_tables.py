@@ -0,0 +1,87 @@
+"""create base tables
+
+Revision ID: 0f3b9d2c7e18
+Revises: 
+Create Date: 2026-10-19 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f3b9d2c7e18'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The schema as originally created by Base.metadata.create_all; later
+    # revisions add to it. Databases created that way are brought under
+    # migrations with `alembic stamp head` instead
+    op.create_table(
+        "workflows",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_workflows_id", "workflows", ["id"])
+    
+    op.create_table(
+        "workflow_components",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workflow_id", sa.Integer(), sa.ForeignKey("workflows.id"), nullable=False),
+        sa.Column("component_type", sa.String(length=50), nullable=False),
+        sa.Column("position_x", sa.Integer(), nullable=True),
+        sa.Column("position_y", sa.Integer(), nullable=True),
+        sa.Column("configuration", sa.JSON(), nullable=True),
+        sa.Column("connections", sa.JSON(), nullable=True),
+    )
+    op.create_index("ix_workflow_components_id", "workflow_components", ["id"])
+    
+    op.create_table(
+        "documents",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("original_filename", sa.String(length=255), nullable=False),
+        sa.Column("file_path", sa.String(length=500), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=False),
+        sa.Column("mime_type", sa.String(length=100), nullable=False),
+        sa.Column("workflow_id", sa.Integer(), sa.ForeignKey("workflows.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("page_count", sa.Integer(), nullable=True),
+        sa.Column("text_content", sa.Text(), nullable=True),
+        sa.Column("embedding_status", sa.String(length=50), nullable=True),
+    )
+    op.create_index("ix_documents_id", "documents", ["id"])
+    
+    op.create_table(
+        "chat_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workflow_id", sa.Integer(), sa.ForeignKey("workflows.id"), nullable=False),
+        sa.Column("session_id", sa.String(length=255), nullable=False),
+        sa.Column("message_type", sa.String(length=20), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("processing_time", sa.Integer(), nullable=True),
+        sa.Column("tokens_used", sa.Integer(), nullable=True),
+        sa.Column("model_used", sa.String(length=100), nullable=True),
+    )
+    op.create_index("ix_chat_messages_id", "chat_messages", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_messages_id", table_name="chat_messages")
+    op.drop_table("chat_messages")
+    op.drop_index("ix_documents_id", table_name="documents")
+    op.drop_table("documents")
+    op.drop_index("ix_workflow_components_id", table_name="workflow_components")
+    op.drop_table("workflow_components")
+    op.drop_index("ix_workflows_id", table_name="workflows")
+    op.drop_table("workflows")
@@ -0,0 +1,35 @@
+"""add document listing indexes
+
+Revision ID: a1c3e5f70926
+Revises: 0f3b9d2c7e18
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70926'
+down_revision: Union[str, None] = '0f3b9d2c7e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_documents_workflow_id_id", ["workflow_id", "id"]),
+    ("ix_documents_embedding_status", ["embedding_status"]),
+    ("ix_documents_created_at", ["created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, "documents", columns)
+
+
+def downgrade() -> None:
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name="documents")
@@ -0,0 +1,28 @@
+"""add document batch id
+
+Revision ID: b7d2f4a81c35
+Revises: a1c3e5f70926
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2f4a81c35'
+down_revision: Union[str, None] = 'a1c3e5f70926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("batch_id", sa.String(length=36), nullable=True))
+    op.create_index("ix_documents_batch_id", "documents", ["batch_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_batch_id", table_name="documents")
+    op.drop_column("documents", "batch_id")
@@ -0,0 +1,29 @@
+"""add workflow deleted_at
+
+Revision ID: c4e9a1b25d67
+Revises: b7d2f4a81c35
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a1b25d67'
+down_revision: Union[str, None] = 'b7d2f4a81c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("workflows", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+    
+    # Workflows deleted before this column existed start their grace period now
+    op.execute("UPDATE workflows SET deleted_at = CURRENT_TIMESTAMP WHERE is_active = false AND deleted_at IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_column("workflows", "deleted_at")
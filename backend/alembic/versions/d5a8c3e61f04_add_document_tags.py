@@ -0,0 +1,36 @@
+"""add document tags
+
+Revision ID: d5a8c3e61f04
+Revises: c4e9a1b25d67
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8c3e61f04'
+down_revision: Union[str, None] = 'c4e9a1b25d67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "document_tags",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("document_id", sa.Integer(), sa.ForeignKey("documents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("tag", sa.String(length=100), nullable=False),
+        sa.UniqueConstraint("document_id", "tag", name="uq_document_tags_document_id_tag"),
+    )
+    op.create_index("ix_document_tags_id", "document_tags", ["id"])
+    op.create_index("ix_document_tags_tag", "document_tags", ["tag"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_document_tags_tag", table_name="document_tags")
+    op.drop_index("ix_document_tags_id", table_name="document_tags")
+    op.drop_table("document_tags")
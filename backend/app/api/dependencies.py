@@ -1,11 +1,13 @@
-from fastapi import Depends
+from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.profiling import is_admin_token
 from app.services.workflow_service import WorkflowService
 from app.services.document_service import DocumentService
 from app.services.llm_service import LLMService
 from app.services.embedding_service import EmbeddingService
 from app.services.chat_service import ChatService
+from app.services.gc_service import GarbageCollectionService
 
 
 def get_workflow_service() -> WorkflowService:
@@ -25,4 +27,16 @@ def get_embedding_service() -> EmbeddingService:
 
 
 def get_chat_service() -> ChatService:
-    return ChatService() 
\ No newline at end of file
+    return ChatService()
+
+
+def get_gc_service() -> GarbageCollectionService:
+    return GarbageCollectionService()
+
+
+def require_admin(x_admin_token: str = Header(None)) -> None:
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
@@ -2,5 +2,7 @@ from .workflow import router as workflow_router
 from .document import router as document_router
 from .chat import router as chat_router
 from .llm import router as llm_router
+from .knowledge_base import router as knowledge_base_router
+from .admin import router as admin_router
 
-__all__ = ["workflow_router", "document_router", "chat_router", "llm_router"] 
\ No newline at end of file
+__all__ = ["workflow_router", "document_router", "chat_router", "llm_router", "knowledge_base_router", "admin_router"] 
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import re
+import json
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import PlainTextResponse
+from typing import List, Dict, Any
+from app.core.config import settings
+from app.api.dependencies import require_admin
+from app.services.providers import provider_registry
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+PROFILE_ID = re.compile(r"^[0-9a-z-]{1,64}$")
+
+
+def profile_path(profile_id: str, extension: str) -> str:
+    if not PROFILE_ID.match(profile_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    path = os.path.join(settings.profiling_dir, f"{profile_id}.{extension}")
+    if not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return path
+
+
+@router.get("/profiles", response_model=List[Dict[str, Any]])
+async def list_profiles():
+    """Saved request and continuous profiles, newest first"""
+    if not os.path.isdir(settings.profiling_dir):
+        return []
+    
+    profiles = []
+    for filename in os.listdir(settings.profiling_dir):
+        if filename.endswith(".json"):
+            with open(os.path.join(settings.profiling_dir, filename)) as f:
+                summary = json.load(f)
+            summary.pop("top", None)
+            profiles.append(summary)
+    return sorted(profiles, key=lambda p: p.get("created_at", 0), reverse=True)
+
+
+@router.get("/profiles/continuous", response_class=PlainTextResponse)
+async def get_continuous_profile(request: Request):
+    """Folded stacks sampled by this worker's continuous profiler since its last flush"""
+    profiler = getattr(request.app.state, "continuous_profiler", None)
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Continuous profiling is disabled"
+        )
+    return profiler.sampler.folded()
+
+
+@router.get("/profiles/{profile_id}", response_model=Dict[str, Any])
+async def get_profile(profile_id: str):
+    """Summary of a profile: request, duration and the functions with the most samples"""
+    with open(profile_path(profile_id, "json")) as f:
+        return json.load(f)
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_stacks(profile_id: str):
+    """Folded stacks of a profile, for flamegraph.pl or speedscope"""
+    with open(profile_path(profile_id, "folded")) as f:
+        return f.read()
+
+
+@router.get("/providers/clients", response_model=List[Dict[str, Any]])
+async def list_provider_clients():
+    """This worker's pooled provider clients with their request and rate-limit counts"""
+    return provider_registry.stats()
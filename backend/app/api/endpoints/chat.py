@@ -1,8 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from typing import List, Dict, Any
 from pydantic import BaseModel
-from app.core.database import get_db
+from app.core.database import get_session, get_chat_read_session, run_db, replica_router, WRITTEN_AT_HEADER
 from app.services.chat_service import ChatService
 from app.api.dependencies import get_chat_service
 
@@ -28,17 +27,22 @@ class ChatMessageResponse(BaseModel):
 async def send_message(
     workflow_id: int,
     message_data: ChatMessageRequest,
-    db: Session = Depends(get_db),
+    response: Response,
+    db=Depends(get_session),
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """Send a message to a workflow and get response"""
     try:
-        result = chat_service.process_user_message(
-            db=db,
+        result = await run_db(
+            chat_service.process_user_message,
+            db,
             workflow_id=workflow_id,
             user_message=message_data.message,
             session_id=message_data.session_id
         )
+        # The session's next history reads must include these messages
+        written_at = replica_router.mark_written(result["session_id"])
+        response.headers[WRITTEN_AT_HEADER] = f"{written_at:.3f}"
         
         if not result["success"]:
             raise HTTPException(
@@ -55,7 +59,7 @@ async def send_message(
             "processing_time": result.get("processing_time"),
             "context_used": result.get("context_used", False)
         }
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -70,13 +74,14 @@ async def get_chat_history(
     workflow_id: int,
     session_id: str = None,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db=Depends(get_chat_read_session),
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """Get chat history for a workflow"""
     try:
-        messages = chat_service.get_chat_history(
-            db=db,
+        messages = await run_db(
+            chat_service.get_chat_history,
+            db,
             workflow_id=workflow_id,
             session_id=session_id,
             limit=limit
@@ -105,12 +110,12 @@ async def get_chat_history(
 @router.get("/sessions/{session_id}", response_model=List[Dict[str, Any]])
 async def get_session_messages(
     session_id: str,
-    db: Session = Depends(get_db),
+    db=Depends(get_chat_read_session),
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """Get all messages for a specific session"""
     try:
-        messages = chat_service.get_session_messages(db, session_id)
+        messages = await run_db(chat_service.get_session_messages, db, session_id)
         
         return [
             {
@@ -135,12 +140,12 @@ async def get_session_messages(
 @router.get("/sessions/{session_id}/summary", response_model=Dict[str, Any])
 async def get_session_summary(
     session_id: str,
-    db: Session = Depends(get_db),
+    db=Depends(get_chat_read_session),
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """Get summary of a conversation session"""
     try:
-        summary = chat_service.get_conversation_summary(db, session_id)
+        summary = await run_db(chat_service.get_conversation_summary, db, session_id)
         return summary
     except Exception as e:
         raise HTTPException(
@@ -152,12 +157,15 @@ async def get_session_summary(
 @router.delete("/sessions/{session_id}")
 async def delete_session(
     session_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    db=Depends(get_session),
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """Delete all messages for a session"""
     try:
-        success = chat_service.delete_session_messages(db, session_id)
+        success = await run_db(chat_service.delete_session_messages, db, session_id)
+        written_at = replica_router.mark_written(session_id)
+        response.headers[WRITTEN_AT_HEADER] = f"{written_at:.3f}"
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,15 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from pydantic import BaseModel
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_session, get_read_session, run_db
 from app.services.document_service import DocumentService
-from app.api.dependencies import get_document_service
+from app.services.gc_service import GarbageCollectionService
+from app.api.dependencies import get_document_service, get_gc_service
+from datetime import datetime
 import os
+import uuid
+import zipfile
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 
+def parse_tags(tags: str = None) -> List[str]:
+    """Comma-separated tags query parameter"""
+    return tags.split(",") if tags else []
+
+
 class DocumentResponse(BaseModel):
     id: int
     filename: str
@@ -25,6 +36,7 @@ class DocumentResponse(BaseModel):
 async def upload_document(
     file: UploadFile = File(...),
     workflow_id: int = None,
+    tags: str = None,
     db: Session = Depends(get_db),
     document_service: DocumentService = Depends(get_document_service)
 ):
@@ -61,7 +73,8 @@ async def upload_document(
             file_path=file_path,
             file_size=len(file_content),
             mime_type=file.content_type or "application/pdf",
-            workflow_id=workflow_id
+            workflow_id=workflow_id,
+            tags=parse_tags(tags)
         )
         
         # Process document (extract text)
@@ -75,9 +88,10 @@ async def upload_document(
             "mime_type": document.mime_type,
             "page_count": document.page_count,
             "embedding_status": document.embedding_status,
+            "tags": [t.tag for t in document.tags],
             "created_at": document.created_at.isoformat()
         }
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -87,33 +101,175 @@ async def upload_document(
         )
 
 
-@router.get("/", response_model=List[Dict[str, Any]])
-async def get_documents(
+@router.post("/upload/bulk", response_model=Dict[str, Any])
+async def upload_documents_bulk(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
     workflow_id: int = None,
+    tags: str = None,
     db: Session = Depends(get_db),
     document_service: DocumentService = Depends(get_document_service)
 ):
-    """Get all documents"""
+    """Upload many PDFs and/or ZIP archives of PDFs in one batch.
+    
+    Files are streamed to disk and recorded immediately; extraction and
+    indexing run in the background. Poll ``/documents/batches/{batch_id}``
+    for per-file progress. ``tags`` (comma-separated) apply to every file.
+    Nothing is recorded unless the whole batch is within ``max_bulk_files``.
+    """
+    batch_id = str(uuid.uuid4())
+    saved = []
+    document_ids = []
+    rejected = []
+    
     try:
-        if workflow_id:
-            documents = document_service.get_documents_by_workflow(db, workflow_id)
-        else:
-            # Get all documents (you might want to add pagination)
-            documents = document_service.get_all_documents(db)
+        for upload in files:
+            if not upload.filename.lower().endswith(('.pdf', '.zip')):
+                rejected.append({"filename": upload.filename, "error": "Only PDF and ZIP files are supported"})
+                continue
+            
+            try:
+                entries = document_service.iter_pdf_entries(upload.filename, upload.file)
+                while True:
+                    # Archive reads and disk writes are blocking, keep them off the event loop
+                    entry = await run_in_threadpool(next, entries, None)
+                    if entry is None:
+                        break
+                    if len(saved) >= settings.max_bulk_files:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Too many files. Maximum per batch is {settings.max_bulk_files}"
+                        )
+                    
+                    entry_name, stream = entry
+                    try:
+                        file_path, file_size = await run_in_threadpool(
+                            document_service.save_file_stream, stream, entry_name, max_size=settings.max_file_size
+                        )
+                    except ValueError as e:
+                        rejected.append({"filename": entry_name, "error": str(e)})
+                        continue
+                    saved.append((entry_name, file_path, file_size))
+            except zipfile.BadZipFile:
+                rejected.append({"filename": upload.filename, "error": "Invalid ZIP archive"})
         
-        return [
+        for entry_name, file_path, file_size in saved:
+            document = await document_service.create_document_record(
+                db=db,
+                filename=os.path.basename(file_path),
+                original_filename=entry_name,
+                file_path=file_path,
+                file_size=file_size,
+                mime_type="application/pdf",
+                workflow_id=workflow_id,
+                batch_id=batch_id,
+                tags=parse_tags(tags)
+            )
+            document_ids.append(document.id)
+        
+        background_tasks.add_task(document_service.process_documents_bulk, document_ids)
+        
+        return {
+            "batch_id": batch_id,
+            "accepted": len(document_ids),
+            "document_ids": document_ids,
+            "rejected": rejected
+        }
+    
+    except Exception as e:
+        # Saved files without a document record would never be cleaned up
+        for _, file_path, _ in saved[len(document_ids):]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error uploading documents: {str(e)}"
+        )
+
+
+@router.get("/batches/{batch_id}", response_model=Dict[str, Any])
+async def get_batch_status(
+    batch_id: str,
+    db=Depends(get_session),
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """Get per-file progress of a bulk upload"""
+    documents = await run_db(document_service.get_batch_documents, db, batch_id)
+    if not documents:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
+        )
+    
+    counts = {"pending": 0, "processing": 0, "completed": 0, "failed": 0}
+    for doc in documents:
+        counts[doc.embedding_status] = counts.get(doc.embedding_status, 0) + 1
+    
+    return {
+        "batch_id": batch_id,
+        "total": len(documents),
+        "counts": counts,
+        "done": counts["pending"] + counts["processing"] == 0,
+        "files": [
             {
                 "id": doc.id,
-                "filename": doc.filename,
                 "original_filename": doc.original_filename,
-                "file_size": doc.file_size,
-                "mime_type": doc.mime_type,
                 "page_count": doc.page_count,
-                "embedding_status": doc.embedding_status,
-                "created_at": doc.created_at.isoformat()
+                "embedding_status": doc.embedding_status
             }
             for doc in documents
         ]
+    }
+
+
+@router.get("/", response_model=Dict[str, Any])
+async def get_documents(
+    workflow_id: int = None,
+    embedding_status: str = None,
+    uploaded_after: datetime = None,
+    uploaded_before: datetime = None,
+    cursor: int = None,
+    limit: int = Query(50, ge=1, le=500),
+    db=Depends(get_read_session),
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """Get a page of documents, newest first.
+    
+    Pass the returned ``next_cursor`` as ``cursor`` to fetch the next page.
+    """
+    try:
+        page = await run_db(
+            document_service.list_documents,
+            db,
+            workflow_id=workflow_id,
+            embedding_status=embedding_status,
+            uploaded_after=uploaded_after,
+            uploaded_before=uploaded_before,
+            cursor=cursor,
+            limit=limit
+        )
+        
+        return {
+            "items": [
+                {
+                    "id": doc.id,
+                    "filename": doc.filename,
+                    "original_filename": doc.original_filename,
+                    "file_size": doc.file_size,
+                    "mime_type": doc.mime_type,
+                    "page_count": doc.page_count,
+                    "embedding_status": doc.embedding_status,
+                    "workflow_id": doc.workflow_id,
+                    "created_at": doc.created_at.isoformat()
+                }
+                for doc in page["items"]
+            ],
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+            "limit": limit
+        }
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -124,11 +280,11 @@ async def get_documents(
 @router.get("/{document_id}", response_model=Dict[str, Any])
 async def get_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     document_service: DocumentService = Depends(get_document_service)
 ):
     """Get document by ID"""
-    document = document_service.get_document_by_id(db, document_id)
+    document = await run_db(document_service.get_document_by_id, db, document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -143,16 +299,39 @@ async def get_document(
         "mime_type": document.mime_type,
         "page_count": document.page_count,
         "embedding_status": document.embedding_status,
+        "tags": [t.tag for t in document.tags],
         "text_content": document.text_content,
         "created_at": document.created_at.isoformat()
     }
 
 
-@router.delete("/{document_id}")
-async def delete_document(
+# A plain def: FastAPI runs it in the thread pool, off the event loop
+@router.put("/{document_id}/tags", response_model=Dict[str, Any])
+def update_document_tags(
     document_id: int,
+    tags: List[str],
     db: Session = Depends(get_db),
     document_service: DocumentService = Depends(get_document_service)
+):
+    """Replace a document's tags, used by knowledge base retrieval filters"""
+    document = document_service.get_document_by_id(db, document_id)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    document = document_service.set_document_tags(db, document, tags)
+    return {"id": document.id, "tags": [t.tag for t in document.tags]}
+
+
+# A plain def: vector, file and row deletion all block, so FastAPI runs it in the thread pool
+@router.delete("/{document_id}")
+def delete_document(
+    document_id: int,
+    db: Session = Depends(get_db),
+    document_service: DocumentService = Depends(get_document_service),
+    gc_service: GarbageCollectionService = Depends(get_gc_service)
 ):
     """Delete document"""
     document = document_service.get_document_by_id(db, document_id)
@@ -163,13 +342,8 @@ async def delete_document(
         )
     
     try:
-        # Delete file from filesystem
-        if os.path.exists(document.file_path):
-            os.remove(document.file_path)
-        
-        # Delete from database
-        db.delete(document)
-        db.commit()
+        # Delete vectors, file and database row
+        gc_service.delete_document(db, document)
         
         return {"message": "Document deleted successfully"}
     except Exception as e:
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional, Union, Literal
+from pydantic import BaseModel, Field
+from datetime import datetime
+from app.core.config import settings
+from app.core.database import get_session
+from app.services.embedding_service import EmbeddingService
+from app.services.retrieval_filters import build_search_filters, build_search_filters_async
+from app.services.retrieval_cache import retrieval_cache
+from app.api.dependencies import get_embedding_service
+
+router = APIRouter(prefix="/knowledge-bases", tags=["knowledge-bases"])
+
+
+class RetrievalFilters(BaseModel):
+    document_ids: Optional[List[int]] = None
+    tags: Optional[List[str]] = None
+    tags_match: str = Field("any", pattern="^(any|all)$")
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+    embedding_status: Optional[Union[str, List[str]]] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    contains: Optional[Union[str, List[str]]] = None
+    not_contains: Optional[Union[str, List[str]]] = None
+
+
+class SearchRequest(BaseModel):
+    query: Optional[str] = None
+    queries: Optional[List[str]] = None
+    n_results: int = Field(5, ge=1, le=100)
+    include: List[Literal["documents", "metadatas", "distances"]] = ["documents", "metadatas", "distances"]
+    filters: Optional[RetrievalFilters] = None
+    workflow_id: Optional[int] = None  # Restricts document-level filters to this workflow's documents
+
+
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def get_retrieval_cache_stats():
+    """Hit rate and latency saved by this process's retrieval result cache"""
+    return retrieval_cache.stats()
+
+
+@router.post("/{collection_name}/search")
+async def search_knowledge_base(
+    collection_name: str,
+    request: SearchRequest,
+    db=Depends(get_session),
+    embedding_service: EmbeddingService = Depends(get_embedding_service)
+):
+    """Semantic search over a knowledge base collection for one or many queries.
+    
+    ``queries`` are embedded in batched requests and answered by a single
+    vectorized query. Results are columnar, one entry per query holding
+    parallel ``ids`` / ``distances`` / ``documents`` / ``metadatas`` lists;
+    ``include`` drops the fields a caller does not need. Filters are
+    translated into Chroma ``where`` / ``where_document`` predicates, so only
+    matching chunks are ranked.
+    """
+    queries = request.queries if request.queries is not None else ([request.query] if request.query else [])
+    if not queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide query or queries"
+        )
+    if len(queries) > settings.max_search_queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many queries. Maximum per request is {settings.max_search_queries}"
+        )
+    
+    try:
+        filters = request.filters.model_dump(exclude_none=True) if request.filters else {}
+        if isinstance(db, AsyncSession):
+            search_filters = await build_search_filters_async(db, filters, request.workflow_id)
+        else:
+            search_filters = await run_in_threadpool(build_search_filters, db, filters, request.workflow_id)
+        
+        fields = [field for field in ("distances", "documents", "metadatas") if field in request.include]
+        if search_filters is None:
+            columns = {"ids": [[] for _ in queries], **{field: [[] for _ in queries] for field in fields}}
+        else:
+            where, where_document = search_filters
+            # Embedding and querying block, keep them off the event loop
+            columns = await run_in_threadpool(
+                embedding_service.search_batch,
+                collection_name=collection_name,
+                queries=queries,
+                n_results=request.n_results,
+                where=where,
+                where_document=where_document,
+                include=fields
+            )
+            if columns is None:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Error searching knowledge base"
+                )
+        
+        # Built directly as a JSONResponse: skipping response model validation and
+        # jsonable_encoder matters for large batches
+        return JSONResponse(content={
+            "collection_name": collection_name,
+            "results": [
+                {"ids": columns["ids"][i], **{field: columns[field][i] for field in fields}}
+                for i in range(len(queries))
+            ]
+        })
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid filters: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching knowledge base: {str(e)}"
+        )
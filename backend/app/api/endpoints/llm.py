@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from app.services.llm_service import LLMService
+from app.services.providers import provider_registry
 from app.api.dependencies import get_llm_service
 
 router = APIRouter(prefix="/llm", tags=["llm"])
@@ -9,7 +10,8 @@ router = APIRouter(prefix="/llm", tags=["llm"])
 
 class LLMRequest(BaseModel):
     prompt: str
-    model: str = "openai"
+    model: str = "openai"  # "gemini" or a registered OpenAI-compatible provider
+    chat_model: Optional[str] = None  # Defaults to the provider's chat model
     temperature: float = 0.7
     max_tokens: int = 1000
 
@@ -47,10 +49,13 @@ async def generate_response(
                 temperature=request.temperature
             )
         else:
+            provider = request.model.lower() if request.model.lower() in provider_registry.names() else "openai"
             result = llm_service.generate_openai_response(
                 prompt=request.prompt,
+                model=request.chat_model,
                 temperature=request.temperature,
-                max_tokens=request.max_tokens
+                max_tokens=request.max_tokens,
+                provider=provider
             )
         
         if "error" in result:
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from pydantic import BaseModel
-from app.core.database import get_db
+from app.core.database import get_session, get_read_session, run_db
 from app.services.workflow_service import WorkflowService
 from app.api.dependencies import get_workflow_service
 
@@ -35,13 +34,14 @@ class ComponentUpdate(BaseModel):
 @router.post("/", response_model=Dict[str, Any])
 async def create_workflow(
     workflow_data: WorkflowCreate,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Create a new workflow"""
     try:
-        workflow = workflow_service.create_workflow(
-            db=db,
+        workflow = await run_db(
+            workflow_service.create_workflow,
+            db,
             name=workflow_data.name,
             description=workflow_data.description
         )
@@ -60,12 +60,12 @@ async def create_workflow(
 
 @router.get("/", response_model=List[Dict[str, Any]])
 async def get_workflows(
-    db: Session = Depends(get_db),
+    db=Depends(get_read_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Get all workflows"""
     try:
-        workflows = workflow_service.get_all_workflows(db)
+        workflows = await run_db(workflow_service.get_all_workflows, db)
         return [
             {
                 "id": w.id,
@@ -86,18 +86,18 @@ async def get_workflows(
 @router.get("/{workflow_id}", response_model=Dict[str, Any])
 async def get_workflow(
     workflow_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Get workflow by ID"""
-    workflow = workflow_service.get_workflow(db, workflow_id)
+    workflow = await run_db(workflow_service.get_workflow, db, workflow_id)
     if not workflow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workflow not found"
         )
     
-    components = workflow_service.get_workflow_components(db, workflow_id)
+    components = await run_db(workflow_service.get_workflow_components, db, workflow_id)
     
     return {
         "id": workflow.id,
@@ -122,12 +122,13 @@ async def get_workflow(
 async def update_workflow(
     workflow_id: int,
     workflow_data: WorkflowUpdate,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Update workflow"""
-    workflow = workflow_service.update_workflow(
-        db=db,
+    workflow = await run_db(
+        workflow_service.update_workflow,
+        db,
         workflow_id=workflow_id,
         name=workflow_data.name,
         description=workflow_data.description
@@ -150,11 +151,11 @@ async def update_workflow(
 @router.delete("/{workflow_id}")
 async def delete_workflow(
     workflow_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Delete workflow"""
-    success = workflow_service.delete_workflow(db, workflow_id)
+    success = await run_db(workflow_service.delete_workflow, db, workflow_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -168,12 +169,13 @@ async def delete_workflow(
 async def add_component(
     workflow_id: int,
     component_data: ComponentCreate,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Add component to workflow"""
-    component = workflow_service.add_component(
-        db=db,
+    component = await run_db(
+        workflow_service.add_component,
+        db,
         workflow_id=workflow_id,
         component_type=component_data.component_type,
         position_x=component_data.position_x,
@@ -200,12 +202,13 @@ async def add_component(
 async def update_component(
     component_id: int,
     component_data: ComponentUpdate,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Update component configuration"""
-    component = workflow_service.update_component(
-        db=db,
+    component = await run_db(
+        workflow_service.update_component,
+        db,
         component_id=component_id,
         configuration=component_data.configuration,
         position_x=component_data.position_x,
@@ -230,11 +233,11 @@ async def update_component(
 @router.get("/{workflow_id}/validate", response_model=Dict[str, Any])
 async def validate_workflow(
     workflow_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Validate workflow structure and configuration"""
-    validation_result = workflow_service.validate_workflow(db, workflow_id)
+    validation_result = await run_db(workflow_service.validate_workflow, db, workflow_id)
     return validation_result
 
 
@@ -243,12 +246,13 @@ async def execute_workflow(
     workflow_id: int,
     query: str,
     session_id: str = None,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Execute workflow with a query"""
-    result = workflow_service.execute_workflow(
-        db=db,
+    result = await run_db(
+        workflow_service.execute_workflow,
+        db,
         workflow_id=workflow_id,
         user_query=query,
         session_id=session_id
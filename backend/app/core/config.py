@@ -1,16 +1,46 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import os
 
 
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./genai_stack.db"
+    database_mode: str = "sync"  # "async" serves API requests through an async engine (aiosqlite / asyncpg)
+    async_database_url: Optional[str] = None  # Defaults to database_url with the async driver
+    create_tables_on_startup: bool = True  # Create missing tables at startup; off where Alembic migrates
+    database_pool_size: int = 10  # Connections kept open per engine (not used for in-memory SQLite)
+    database_max_overflow: int = 20  # Extra connections opened under load
+    database_pool_recycle: int = 1800  # Seconds before a connection is replaced, -1 never
+    database_pool_timeout: int = 30  # Seconds to wait for a free connection
+    database_statement_cache_size: int = 500  # Compiled SQL cache; also asyncpg's prepared statement cache
+    sql_echo: bool = False  # Log every SQL statement, independent of debug
+    database_replica_urls: List[str] = []  # Read replicas for history and listing endpoints, as a JSON list
+    replica_max_lag_seconds: float = 10.0  # Replicas further behind the primary are skipped
+    replica_lag_check_seconds: int = 5  # How often replica lag is measured (PostgreSQL)
+    read_your_writes_seconds: float = 30.0  # A chat session reads from the primary this long after it writes
+    sqlite_journal_mode: str = "wal"  # SQLite pragmas applied on connect; empty keeps SQLite's default
+    sqlite_synchronous: str = "normal"
+    sqlite_mmap_size: int = 268435456  # 256MB
+    sqlite_busy_timeout_ms: int = 5000
     
     # OpenAI
     openai_api_key: Optional[str] = None
     openai_model: str = "gpt-4o-mini"
     openai_embedding_model: str = "text-embedding-3-large"
+    embedding_batch_size: int = 256  # Texts per embeddings request
+    openai_embedding_dimensions: Optional[int] = None  # Shorter vectors for new collections, e.g. 256
+    openai_base_url: Optional[str] = None  # OpenAI-compatible endpoint used in place of api.openai.com
+    
+    # OpenAI-compatible providers (vLLM, llama.cpp, gateways), selected by name in llm_engine / knowledge_base
+    # components. JSON object of name -> {"base_url", "api_key", "chat_model", "embedding_model", "models",
+    # "timeout", "max_connections"}; only base_url is required. llm_engine and knowledge_base components may set
+    # their own "api_key" for OpenAI-compatible providers
+    llm_providers: Dict[str, Dict[str, Any]] = {}
+    provider_timeout_seconds: float = 60.0  # Default request timeout per provider
+    provider_max_connections: int = 100  # Default connection pool size per provider
+    provider_client_pool_size: int = 64  # Clients kept per process, one per provider, base URL and API key
+    provider_client_idle_seconds: int = 600  # Clients unused this long are closed
     
     # Google (Gemini)
     google_api_key: Optional[str] = None
@@ -22,14 +52,61 @@ class Settings(BaseSettings):
     # ChromaDB
     chroma_persist_directory: str = "./chroma_db"
     
+    # Vector Store
+    vector_backend: str = "chroma"  # Default backend for new collections: chroma or numpy
+    numpy_store_directory: str = "./vector_store"
+    numpy_store_dtype: str = "float32"  # float32, float16 or int8 (quantized, re-ranked at full precision)
+    numpy_store_rerank_factor: int = 4  # int8 shortlist size as a multiple of n_results
+    hnsw_default_preset: Optional[str] = None  # small, medium or large; None keeps Chroma's defaults
+    search_fanout_workers: int = 8  # Threads querying the collections of multi-collection knowledge bases
+    max_search_queries: int = 1000  # Queries per batched knowledge base search request
+    retrieval_cache_size: int = 1024  # Cached search results per process, 0 disables
+    retrieval_cache_ttl_seconds: int = 0  # Entries are invalidated by collection versions; 0 means no expiry
+    
+    # Retrieval context assembly (overridable per knowledge base)
+    context_candidate_results: int = 10  # Chunks fetched before filtering and packing
+    context_token_budget: int = 1500  # Maximum prompt tokens spent on retrieved context
+    context_max_distance: Optional[float] = None  # Cosine distance beyond which chunks are dropped
+    context_dedup_threshold: float = 0.85  # Word-trigram Jaccard similarity treated as a duplicate
+    
     # Application
     secret_key: str = "your-secret-key-change-this"
     debug: bool = True
     allowed_hosts: List[str] = ["*"]
+    admin_token: Optional[str] = None  # Sent as X-Admin-Token to use admin features; unset disables them
+    metrics_enabled: bool = True  # Per-route request metrics on /metrics
+    
+    # Tracing (OpenTelemetry)
+    tracing_enabled: bool = False  # Also adds X-Trace-Id to responses; without it the header is not sent
+    tracing_sample_rate: float = 0.1  # Share of new traces recorded; callers' traceparent decisions are kept
+    tracing_exporter: str = "file"  # file, otlp or console
+    tracing_file_path: str = "./traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_service_name: str = "genai-stack-backend"
+    
+    # Profiling
+    profiling_dir: str = "./profiles"
+    profiling_interval_ms: float = 5  # Sampling interval of requests profiled with X-Profile
+    continuous_profiling_hz: float = 0  # Background sampling of app/services, 0 disables; 10 is cheap enough to leave on
+    continuous_profiling_flush_seconds: int = 300
     
     # File Upload
     max_file_size: int = 10485760  # 10MB
     upload_dir: str = "./uploads"
+    max_bulk_files: int = 5000
+    
+    # Document Processing
+    ingest_workers: Optional[int] = None  # Extraction processes, defaults to CPU count
+    ingest_max_concurrency: int = 8  # Documents processed at once per batch
+    chunk_size: int = 1000  # Characters per indexed chunk
+    chunk_overlap: int = 200
+    extraction_cache_dir: Optional[str] = "./extraction_cache"  # Empty to disable
+    ingest_manifest_dir: str = "./ingest_manifests"  # Resume manifests of offline ingestion runs
+    
+    # Garbage Collection
+    gc_interval_seconds: int = 3600  # 0 disables the background reaper
+    workflow_purge_grace_days: int = 7  # Days a deleted workflow's data is kept
+    vector_compaction_ratio: float = 0.2  # Rebuild a collection once this share of it is deleted vectors
     
     class Config:
         env_file = ".env"
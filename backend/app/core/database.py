@@ -1,14 +1,68 @@
-from sqlalchemy import create_engine
+import time
+import threading
+import itertools
+from typing import Dict, Any, List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from fastapi import Header
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
 
+# Returned by chat writes and echoed by clients, so any worker can keep read-your-writes
+WRITTEN_AT_HEADER = "x-written-at"
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Engine keyword arguments of the performance profile in settings"""
+    url = make_url(url)
+    options = {
+        "pool_pre_ping": True,
+        "echo": settings.sql_echo,
+        "query_cache_size": settings.database_statement_cache_size
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": settings.database_statement_cache_size}
+    if not issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        # In-memory SQLite keeps a single connection and aiosqlite opens one per
+        # checkout (NullPool); neither pool takes sizing arguments
+        return options
+    
+    options.update(
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_recycle=settings.database_pool_recycle,
+        pool_timeout=settings.database_pool_timeout
+    )
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    pragmas = {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "busy_timeout": settings.sqlite_busy_timeout_ms
+    }
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        if value not in (None, ""):
+            cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def configure_engine(engine) -> None:
+    """Apply the SQLite pragmas in settings to every new connection of a sync engine"""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+
+
 # Create database engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    echo=settings.debug
-)
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+configure_engine(engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -17,10 +71,181 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def create_tables() -> None:
+    """Create missing tables from the models, for development databases without migrations"""
+    import app.models  # Registers the tables
+    
+    Base.metadata.create_all(bind=engine)
+
+
+def get_async_database_url(url: str, replica: bool = False) -> str:
+    """Async driver URL for a sync database URL (aiosqlite for SQLite, asyncpg for Postgres)"""
+    if settings.async_database_url and not replica:
+        return settings.async_database_url
+    scheme, rest = url.split("://", 1)
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+    return f"{driver.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+# Async engine, used by the API when database_mode is "async"
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_mode == "async":
+    async_database_url = get_async_database_url(settings.database_url)
+    async_engine = create_async_engine(async_database_url, **engine_options(async_database_url))
+    configure_engine(async_engine.sync_engine)
+    # Loaded attributes stay usable after commit; async sessions cannot lazy-load them
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+class ReplicaRouter:
+    """Sends read-only requests to read replicas, within a staleness policy.
+    
+    Replicas are used round-robin. A replica whose measured lag exceeds
+    ``replica_max_lag_seconds`` is skipped until it catches up; lag is only
+    measured on PostgreSQL, other replicas are always considered fresh.
+    
+    A chat session that wrote within ``read_your_writes_seconds`` reads from
+    the primary so it sees its own messages. Writes are remembered by the
+    worker that handled them, and their time is returned in ``X-Written-At``;
+    a client echoing that header gets the same guarantee from every worker.
+    """
+    
+    def __init__(self, urls: List[str]):
+        self.engines, self.sessions, self.async_sessions = [], [], []
+        for url in urls:
+            replica_engine = create_engine(url, **engine_options(url))
+            configure_engine(replica_engine)
+            self.engines.append(replica_engine)
+            self.sessions.append(sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+            if settings.database_mode == "async":
+                async_url = get_async_database_url(url, replica=True)
+                replica_async_engine = create_async_engine(async_url, **engine_options(async_url))
+                configure_engine(replica_async_engine.sync_engine)
+                self.async_sessions.append(
+                    async_sessionmaker(replica_async_engine, autoflush=False, expire_on_commit=False)
+                )
+        self.lag: List[float] = [0.0] * len(self.engines)
+        self._next = itertools.count()
+        self._writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def mark_written(self, key: Optional[str]) -> float:
+        """Record a write by a chat session, pinning its reads to the primary for a while.
+        
+        Returns the write's wall-clock time, for the ``X-Written-At`` header.
+        """
+        written_at = time.time()
+        if not key or not self.engines:
+            return written_at
+        now = time.monotonic()
+        with self._lock:
+            self._writes[key] = now
+            if len(self._writes) > 10000:
+                cutoff = now - settings.read_your_writes_seconds
+                self._writes = {k: t for k, t in self._writes.items() if t > cutoff}
+        return written_at
+    
+    def pick(self, key: Optional[str] = None, written_at: Optional[float] = None) -> Optional[int]:
+        """Index of the replica to read from, or None for the primary.
+        
+        ``written_at`` is a client's last ``X-Written-At``, possibly from another worker.
+        """
+        if not self.engines:
+            return None
+        if written_at is not None and time.time() - written_at < settings.read_your_writes_seconds:
+            return None
+        if key:
+            with self._lock:
+                written = self._writes.get(key)
+            if written is not None and time.monotonic() - written < settings.read_your_writes_seconds:
+                return None
+        fresh = [i for i, lag in enumerate(self.lag) if lag <= settings.replica_max_lag_seconds]
+        return fresh[next(self._next) % len(fresh)] if fresh else None
+    
+    def refresh_lag(self) -> None:
+        """Measure each replica's replay lag; unreachable replicas are taken out of rotation"""
+        for i, replica_engine in enumerate(self.engines):
+            if replica_engine.dialect.name != "postgresql":
+                continue
+            try:
+                with replica_engine.connect() as conn:
+                    # Zero when all received WAL is replayed, so an idle primary does not look like lag
+                    self.lag[i] = float(conn.execute(text(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                    )).scalar())
+            except Exception as e:
+                print(f"Error checking replica lag: {e}")
+                self.lag[i] = float("inf")
+
+
+replica_router = ReplicaRouter(settings.database_replica_urls)
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+async def _open_session(sync_factory, async_factory):
+    if async_factory is not None:
+        async with async_factory() as db:
+            yield db
+    else:
+        db = sync_factory()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+async def get_session():
+    """Dependency to get the API's database session.
+    
+    An ``AsyncSession`` in async mode, otherwise a sync ``Session``. Pass it to
+    service methods through ``run_db`` so neither kind blocks the event loop.
+    """
+    async for db in _open_session(SessionLocal, AsyncSessionLocal):
+        yield db
+
+
+async def _read_session(key: Optional[str], written_at: Optional[float] = None):
+    replica = replica_router.pick(key, written_at)
+    if replica is None:
+        async for db in _open_session(SessionLocal, AsyncSessionLocal):
+            yield db
+    else:
+        async_factory = replica_router.async_sessions[replica] if replica_router.async_sessions else None
+        async for db in _open_session(replica_router.sessions[replica], async_factory):
+            yield db
+
+
+async def get_read_session():
+    """``get_session`` for read-only endpoints, served by a replica when one is fresh enough"""
+    async for db in _read_session(None):
+        yield db
+
+
+async def get_chat_read_session(
+    session_id: Optional[str] = None,
+    x_written_at: Optional[float] = Header(None)
+):
+    """``get_read_session`` that keeps read-your-writes for the chat session in the path or query"""
+    async for db in _read_session(session_id, x_written_at):
+        yield db
+
+
+async def run_db(method, db, *args, **kwargs):
+    """Call a service method with a session from ``get_session``.
+    
+    With an ``AsyncSession`` the method's ``<name>_async`` variant is awaited;
+    with a sync ``Session`` the method itself runs in the thread pool.
+    """
+    if isinstance(db, AsyncSession):
+        return await getattr(method.__self__, f"{method.__name__}_async")(db, *args, **kwargs)
+    return await run_in_threadpool(method, db, *args, **kwargs)
@@ -0,0 +1,159 @@
+import time
+from typing import Optional
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from starlette.routing import Match
+from opentelemetry.trace import SpanKind
+from app.core.config import settings
+from app.core.tracing import tracer
+
+# Metrics are per process; with several workers, scrape each one or aggregate by instance
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests being served by route", ["method", "route"]
+)
+provider_call_duration = Histogram(
+    "provider_call_duration_seconds", "Latency of calls to LLM, embedding and search providers",
+    ["provider", "operation"], buckets=LATENCY_BUCKETS
+)
+provider_errors = Counter(
+    "provider_errors_total", "Failed provider calls, rate limiting included", ["provider", "operation"]
+)
+provider_rate_limited = Counter(
+    "provider_rate_limited_total", "Provider calls rejected with HTTP 429", ["provider", "operation"]
+)
+model_tokens = Counter(
+    "model_tokens_total", "Tokens sent to (in) and generated by (out) each model", ["model", "direction"]
+)
+embedding_batch_size = Histogram(
+    "embedding_batch_size", "Texts per embeddings request",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+)
+vector_query_duration = Histogram(
+    "vector_query_duration_seconds", "Vector store query latency by backend",
+    ["backend"], buckets=LATENCY_BUCKETS
+)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status == 429 or type(error).__name__ in ("RateLimitError", "ResourceExhausted")
+
+
+class track_provider_call:
+    """Times a provider call in a client span and counts its errors; exceptions propagate.
+        
+        with track_provider_call("openai", "chat"):
+            response = client.chat.completions.create(...)
+    """
+    
+    __slots__ = ("provider", "operation", "start", "span")
+    
+    def __init__(self, provider: str, operation: str):
+        self.provider = provider
+        self.operation = operation
+    
+    def __enter__(self):
+        self.span = tracer.start_as_current_span(f"{self.provider}.{self.operation}", kind=SpanKind.CLIENT)
+        self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.span.__exit__(exc_type, exc, tb)
+        provider_call_duration.labels(self.provider, self.operation).observe(time.perf_counter() - self.start)
+        if exc is not None:
+            provider_errors.labels(self.provider, self.operation).inc()
+            if _is_rate_limited(exc):
+                provider_rate_limited.labels(self.provider, self.operation).inc()
+        return False
+
+
+def record_tokens(model: str, tokens_in: Optional[int], tokens_out: Optional[int] = None) -> None:
+    if tokens_in:
+        model_tokens.labels(model, "in").inc(tokens_in)
+    if tokens_out:
+        model_tokens.labels(model, "out").inc(tokens_out)
+
+
+_collectors_registered = False
+
+
+def register_collectors() -> None:
+    """Gauges read at scrape time: retrieval cache, provider client pool and database pool usage.
+    
+    Registered once per process, however many times the app is built.
+    """
+    global _collectors_registered
+    if _collectors_registered:
+        return
+    _collectors_registered = True
+    
+    from app.core.database import engine
+    from app.services.retrieval_cache import retrieval_cache
+    from app.services.providers import provider_registry
+    
+    cache_stat = Gauge("retrieval_cache", "Retrieval cache statistics", ["stat"])
+    for stat in ("entries", "hits", "misses", "hit_rate"):
+        cache_stat.labels(stat).set_function(lambda stat=stat: retrieval_cache.stats()[stat])
+    
+    Gauge("provider_clients", "Pooled provider clients").set_function(lambda: len(provider_registry.stats()))
+    
+    pool = engine.pool
+    pool_stat = Gauge("db_pool_connections", "Primary database pool connections", ["state"])
+    # In-memory SQLite pools have no size accounting
+    if hasattr(pool, "checkedout"):
+        pool_stat.labels("checked_out").set_function(pool.checkedout)
+        pool_stat.labels("idle").set_function(pool.checkedin)
+        pool_stat.labels("overflow").set_function(lambda: max(pool.overflow(), 0))
+        pool_stat.labels("size").set_function(pool.size)
+
+
+def route_template(routes, scope) -> str:
+    """Path template of the route serving a request, "unmatched" if none does"""
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight requests per route template.
+    
+    Requests are labelled with the matched route's path (``/api/v1/chat/{workflow_id}/send``),
+    so label cardinality is bounded by the number of routes.
+    """
+    
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        route = route_template(self.routes, scope)
+        status = {"code": 500}
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+        
+        in_flight = http_requests_in_flight.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            http_request_duration.labels(method, route, str(status["code"])).observe(time.perf_counter() - start)
+
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+import uuid
+import hmac
+import threading
+from collections import Counter
+from typing import Dict, Optional
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.dirname(APP_DIR)
+SERVICES_DIR = os.path.join(APP_DIR, "services")
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+ADMIN_TOKEN_HEADER = "x-admin-token"
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """True if ``token`` matches the configured admin token; always False when none is set"""
+    return bool(settings.admin_token) and token is not None and hmac.compare_digest(token, settings.admin_token)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(BACKEND_DIR):
+        filename = os.path.relpath(filename, BACKEND_DIR)
+    else:
+        filename = os.path.join(*filename.split(os.sep)[-2:]) if os.sep in filename else filename
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sampling profiler: records the Python stacks of every other thread at an interval.
+    
+    Stacks are counted in folded form (``root;caller;callee count``), which
+    flamegraph.pl and speedscope read directly. With ``app_only`` a stack is
+    kept only if it passes through ``app/services``, and frames above the
+    first ``app/`` frame are dropped.
+    """
+    
+    def __init__(self, interval: float, app_only: bool = False):
+        self.interval = interval
+        self.app_only = app_only
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _fold(self, frame, thread_name: str) -> Optional[str]:
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        if self.app_only:
+            if not any(f.f_code.co_filename.startswith(SERVICES_DIR) for f in frames):
+                return None
+            first = next(i for i, f in enumerate(frames) if f.f_code.co_filename.startswith(APP_DIR))
+            frames = frames[first:]
+        return ";".join([thread_name] + [_frame_label(f) for f in frames])
+    
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        folded = [
+            self._fold(frame, names.get(ident, str(ident)))
+            for ident, frame in sys._current_frames().items()
+            if ident != own
+        ]
+        with self._lock:
+            self.samples += 1
+            self.stacks.update(stack for stack in folded if stack)
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+    
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+    
+    def drain(self) -> Counter:
+        """Stack counts so far, resetting the sampler"""
+        with self._lock:
+            stacks, self.stacks, self.samples = self.stacks, Counter(), 0
+            return stacks
+    
+    def folded(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def top_functions(stacks: Counter, limit: int = 25) -> list:
+    """Functions by samples spent in them (self) and under them (total)"""
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]
+        if frames:
+            own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return [
+        {"function": function, "self_samples": own[function], "total_samples": count}
+        for function, count in total.most_common(limit)
+    ]
+
+
+def _write_profile(profile_id: str, stacks: Counter, summary: Dict) -> None:
+    os.makedirs(settings.profiling_dir, exist_ok=True)
+    with open(os.path.join(settings.profiling_dir, f"{profile_id}.folded"), "w") as f:
+        f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    with open(os.path.join(settings.profiling_dir, f"{profile_id}.json"), "w") as f:
+        json.dump({**summary, "top": top_functions(stacks)}, f, indent=2)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests sent with ``X-Profile`` and a valid ``X-Admin-Token``.
+    
+    The profile id is returned in ``X-Profile-Id``; the flamegraph stacks and
+    a summary are saved under ``profiling_dir`` and served by the admin API.
+    All threads are sampled, so work for concurrent requests shows up too;
+    profile on a quiet worker for a clean picture.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if PROFILE_HEADER.encode() not in headers or not is_admin_token(
+            headers.get(ADMIN_TOKEN_HEADER.encode(), b"").decode("latin-1") or None
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = uuid.uuid4().hex
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER.encode(), profile_id.encode())]
+            await send(message)
+        
+        sampler = StackSampler(settings.profiling_interval_ms / 1000).start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # stop() joins the sampler thread; neither it nor the writes belong on the event loop
+            await run_in_threadpool(sampler.stop)
+            summary = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "samples": sampler.samples,
+                "interval_ms": settings.profiling_interval_ms,
+                "created_at": time.time()
+            }
+            try:
+                await run_in_threadpool(_write_profile, profile_id, sampler.drain(), summary)
+            except OSError as e:
+                print(f"Error saving profile: {e}")
+
+
+class ContinuousProfiler:
+    """Low-rate sampling of ``app/services`` hot paths, flushed to a file periodically"""
+    
+    def __init__(self):
+        self.sampler = StackSampler(1 / settings.continuous_profiling_hz, app_only=True)
+        self._flusher: Optional[threading.Timer] = None
+    
+    def _flush(self) -> None:
+        stacks = self.sampler.drain()
+        if stacks:
+            profile_id = f"continuous-{os.getpid()}-{int(time.time())}"
+            summary = {"id": profile_id, "continuous": True, "rate_hz": settings.continuous_profiling_hz,
+                       "samples": sum(stacks.values()), "created_at": time.time()}
+            try:
+                _write_profile(profile_id, stacks, summary)
+            except OSError as e:
+                print(f"Error saving profile: {e}")
+        self._schedule()
+    
+    def _schedule(self) -> None:
+        self._flusher = threading.Timer(settings.continuous_profiling_flush_seconds, self._flush)
+        self._flusher.daemon = True
+        self._flusher.start()
+    
+    def start(self) -> None:
+        self.sampler.start()
+        self._schedule()
+    
+    def stop(self) -> None:
+        if self._flusher:
+            self._flusher.cancel()
+        self.sampler.stop()
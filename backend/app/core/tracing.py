@@ -0,0 +1,129 @@
+import json
+import inspect
+import functools
+from typing import Any, Sequence
+from opentelemetry import trace, propagate
+from app.core.config import settings
+
+# Resolves to a no-op tracer until configure_tracing installs the SDK
+tracer = trace.get_tracer("genai-stack")
+
+TRACE_ID_HEADER = "x-trace-id"
+
+
+def traced(name: str):
+    """Decorator running a function, sync or async, inside a span"""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Annotate the current span; None values are skipped"""
+    span = trace.get_current_span()
+    if span.is_recording():
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(key, value)
+
+
+class FileSpanExporter:
+    """Appends finished spans to a file, one OTLP-style JSON object per line"""
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def export(self, spans: Sequence) -> Any:
+        from opentelemetry.sdk.trace.export import SpanExportResult
+        
+        try:
+            with open(self.path, "a") as f:
+                for span in spans:
+                    f.write(json.dumps(json.loads(span.to_json()), separators=(",", ":")) + "\n")
+            return SpanExportResult.SUCCESS
+        except OSError as e:
+            print(f"Error exporting spans: {e}")
+            return SpanExportResult.FAILURE
+    
+    def shutdown(self) -> None:
+        pass
+    
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def configure_tracing() -> bool:
+    """Install the OpenTelemetry SDK with the exporter and sampling rate in settings"""
+    if not settings.tracing_enabled:
+        return False
+    
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        
+        exporter = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    elif settings.tracing_exporter == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        exporter = FileSpanExporter(settings.tracing_file_path)
+    
+    # Upstream sampling decisions (traceparent) are honoured, new traces are sampled at the configured rate
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_rate))
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return True
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per request and returning its trace id.
+    
+    Continues a trace from an incoming ``traceparent`` header. The trace id is
+    sent back in ``X-Trace-Id`` whether or not the trace was sampled.
+    """
+    
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        from app.core.metrics import route_template  # metrics imports this module
+        
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        route = route_template(self.routes, scope)
+        with tracer.start_as_current_span(
+            f"{scope['method']} {route}",
+            context=propagate.extract(headers),
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.route": route, "http.target": scope["path"]}
+        ) as span:
+            trace_id = format(span.get_span_context().trace_id, "032x").encode()
+            
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(TRACE_ID_HEADER.encode(), trace_id)]
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+            
+            await self.app(scope, receive, send_wrapper)
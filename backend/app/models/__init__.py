@@ -1,5 +1,5 @@
 from .workflow import Workflow, WorkflowComponent
-from .document import Document
+from .document import Document, DocumentTag
 from .chat import ChatMessage
 
-__all__ = ["Workflow", "WorkflowComponent", "Document", "ChatMessage"] 
\ No newline at end of file
+__all__ = ["Workflow", "WorkflowComponent", "Document", "DocumentTag", "ChatMessage"] 
\ No newline at end of file
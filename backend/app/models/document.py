@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -14,9 +14,41 @@ class Document(Base):
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String(100), nullable=False)
     workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
     # Additional metadata
     page_count = Column(Integer, nullable=True)
     text_content = Column(Text, nullable=True)  # Extracted text content
-    embedding_status = Column(String(50), default="pending")  # pending, processing, completed, failed 
\ No newline at end of file
+    embedding_status = Column(String(50), default="pending", index=True)  # pending, processing, completed, failed
+    batch_id = Column(String(36), nullable=True, index=True)  # Set for documents uploaded through bulk upload
+    
+    tags = relationship("DocumentTag", back_populates="document", cascade="all, delete-orphan")
+    
+    # Serves workflow_id lookups and keyset pagination within a workflow
+    __table_args__ = (
+        Index("ix_documents_workflow_id_id", "workflow_id", "id"),
+    )
+
+
+class DocumentTag(Base):
+    __tablename__ = "document_tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    tag = Column(String(100), nullable=False, index=True)
+    
+    document = relationship("Document", back_populates="tags")
+    
+    @staticmethod
+    def normalize(tags) -> list:
+        """Trimmed, lower-cased, de-duplicated tags in their original order"""
+        normalized = []
+        for tag in tags or []:
+            tag = tag.strip().lower()[:100]
+            if tag and tag not in normalized:
+                normalized.append(tag)
+        return normalized
+    
+    __table_args__ = (
+        UniqueConstraint("document_id", "tag", name="uq_document_tags_document_id_tag"),
+    )
@@ -13,6 +13,7 @@ class Workflow(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # Set when deactivated; purged after a grace period
     
     # Relationship to components
     components = relationship("WorkflowComponent", back_populates="workflow", cascade="all, delete-orphan")
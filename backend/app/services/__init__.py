@@ -1,8 +1,21 @@
-from .workflow_service import WorkflowService
-from .document_service import DocumentService
-from .llm_service import LLMService
-from .embedding_service import EmbeddingService
-from .chat_service import ChatService
+import importlib
+
+# Services are imported on first access so that importing one service module
+# does not load every provider SDK behind the others
+_modules = {
+    "WorkflowService": ".workflow_service",
+    "DocumentService": ".document_service",
+    "LLMService": ".llm_service",
+    "EmbeddingService": ".embedding_service",
+    "ChatService": ".chat_service"
+}
+
+
+def __getattr__(name):
+    if name in _modules:
+        return getattr(importlib.import_module(_modules[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "WorkflowService",
@@ -10,4 +23,4 @@ __all__ = [
     "LLMService",
     "EmbeddingService",
     "ChatService"
-] 
\ No newline at end of file
+]
@@ -1,7 +1,10 @@
 from typing import Dict, Any, List, Optional
+from sqlalchemy import select, delete
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.chat import ChatMessage
 from app.services.workflow_service import WorkflowService
+from app.core.tracing import traced
 import uuid
 from datetime import datetime
 
@@ -10,6 +13,7 @@ class ChatService:
     def __init__(self):
         self.workflow_service = WorkflowService()
     
+    @traced("chat.save_message")
     def create_chat_message(
         self, 
         db: Session, 
@@ -37,6 +41,34 @@ class ChatService:
         db.refresh(chat_message)
         return chat_message
     
+    @traced("chat.save_message")
+    async def create_chat_message_async(
+        self,
+        db: AsyncSession,
+        workflow_id: int,
+        session_id: str,
+        message_type: str,
+        content: str,
+        processing_time: int = None,
+        tokens_used: int = None,
+        model_used: str = None
+    ) -> ChatMessage:
+        """Async variant of create_chat_message"""
+        chat_message = ChatMessage(
+            workflow_id=workflow_id,
+            session_id=session_id,
+            message_type=message_type,
+            content=content,
+            processing_time=processing_time,
+            tokens_used=tokens_used,
+            model_used=model_used
+        )
+        
+        db.add(chat_message)
+        await db.commit()
+        await db.refresh(chat_message)
+        return chat_message
+    
     def get_chat_history(
         self, 
         db: Session, 
@@ -52,6 +84,22 @@ class ChatService:
         
         return query.order_by(ChatMessage.created_at.desc()).limit(limit).all()
     
+    async def get_chat_history_async(
+        self,
+        db: AsyncSession,
+        workflow_id: int,
+        session_id: str = None,
+        limit: int = 50
+    ) -> List[ChatMessage]:
+        """Async variant of get_chat_history"""
+        stmt = select(ChatMessage).where(ChatMessage.workflow_id == workflow_id)
+        
+        if session_id:
+            stmt = stmt.where(ChatMessage.session_id == session_id)
+        
+        result = await db.execute(stmt.order_by(ChatMessage.created_at.desc()).limit(limit))
+        return list(result.scalars())
+    
     def get_session_messages(
         self, 
         db: Session, 
@@ -62,10 +110,18 @@ class ChatService:
             ChatMessage.session_id == session_id
         ).order_by(ChatMessage.created_at.asc()).all()
     
+    async def get_session_messages_async(self, db: AsyncSession, session_id: str) -> List[ChatMessage]:
+        """Async variant of get_session_messages"""
+        result = await db.execute(
+            select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at.asc())
+        )
+        return list(result.scalars())
+    
     def create_session_id(self) -> str:
         """Create a new session ID"""
         return str(uuid.uuid4())
     
+    @traced("chat.process_message")
     def process_user_message(
         self, 
         db: Session, 
@@ -101,19 +157,63 @@ class ChatService:
         end_time = datetime.now()
         processing_time = int((end_time - start_time).total_seconds() * 1000)
         
+        reply = self._reply_message(workflow_result, processing_time)
+        self.create_chat_message(db=db, workflow_id=workflow_id, session_id=session_id, **reply)
+        return self._process_result(workflow_result, session_id, processing_time)
+    
+    @traced("chat.process_message")
+    async def process_user_message_async(
+        self,
+        db: AsyncSession,
+        workflow_id: int,
+        user_message: str,
+        session_id: str = None
+    ) -> Dict[str, Any]:
+        """Async variant of process_user_message"""
+        start_time = datetime.now()
+        
+        if not session_id:
+            session_id = self.create_session_id()
+        
+        await self.create_chat_message_async(
+            db=db,
+            workflow_id=workflow_id,
+            session_id=session_id,
+            message_type="user",
+            content=user_message
+        )
+        
+        workflow_result = await self.workflow_service.execute_workflow_async(
+            db=db,
+            workflow_id=workflow_id,
+            user_query=user_message,
+            session_id=session_id
+        )
+        
+        processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+        
+        reply = self._reply_message(workflow_result, processing_time)
+        await self.create_chat_message_async(db=db, workflow_id=workflow_id, session_id=session_id, **reply)
+        return self._process_result(workflow_result, session_id, processing_time)
+    
+    def _reply_message(self, workflow_result: Dict[str, Any], processing_time: int) -> Dict[str, Any]:
+        """Fields of the message saved after a workflow run: the response, or the error"""
+        if workflow_result["success"]:
+            return {
+                "message_type": "assistant",
+                "content": workflow_result["response"],
+                "processing_time": processing_time,
+                "tokens_used": (workflow_result.get("usage") or {}).get("total_tokens"),
+                "model_used": workflow_result.get("model")
+            }
+        return {
+            "message_type": "system",
+            "content": f"Error: {workflow_result['error']}",
+            "processing_time": processing_time
+        }
+    
+    def _process_result(self, workflow_result: Dict[str, Any], session_id: str, processing_time: int) -> Dict[str, Any]:
         if workflow_result["success"]:
-            # Save assistant response
-            assistant_chat_message = self.create_chat_message(
-                db=db,
-                workflow_id=workflow_id,
-                session_id=session_id,
-                message_type="assistant",
-                content=workflow_result["response"],
-                processing_time=processing_time,
-                tokens_used=workflow_result.get("usage", {}).get("total_tokens"),
-                model_used=workflow_result.get("model")
-            )
-            
             return {
                 "success": True,
                 "session_id": session_id,
@@ -123,23 +223,12 @@ class ChatService:
                 "processing_time": processing_time,
                 "context_used": workflow_result.get("context_used", False)
             }
-        else:
-            # Save error message
-            error_chat_message = self.create_chat_message(
-                db=db,
-                workflow_id=workflow_id,
-                session_id=session_id,
-                message_type="system",
-                content=f"Error: {workflow_result['error']}",
-                processing_time=processing_time
-            )
-            
-            return {
-                "success": False,
-                "session_id": session_id,
-                "error": workflow_result["error"],
-                "processing_time": processing_time
-            }
+        return {
+            "success": False,
+            "session_id": session_id,
+            "error": workflow_result["error"],
+            "processing_time": processing_time
+        }
     
     def get_conversation_summary(
         self, 
@@ -147,8 +236,13 @@ class ChatService:
         session_id: str
     ) -> Dict[str, Any]:
         """Get summary of a conversation session"""
-        messages = self.get_session_messages(db, session_id)
-        
+        return self._summarize(session_id, self.get_session_messages(db, session_id))
+    
+    async def get_conversation_summary_async(self, db: AsyncSession, session_id: str) -> Dict[str, Any]:
+        """Async variant of get_conversation_summary"""
+        return self._summarize(session_id, await self.get_session_messages_async(db, session_id))
+    
+    def _summarize(self, session_id: str, messages: List[ChatMessage]) -> Dict[str, Any]:
         if not messages:
             return {
                 "session_id": session_id,
@@ -198,4 +292,15 @@ class ChatService:
         except Exception as e:
             db.rollback()
             print(f"Error deleting session messages: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    async def delete_session_messages_async(self, db: AsyncSession, session_id: str) -> bool:
+        """Async variant of delete_session_messages"""
+        try:
+            await db.execute(delete(ChatMessage).where(ChatMessage.session_id == session_id))
+            await db.commit()
+            return True
+        except Exception as e:
+            await db.rollback()
+            print(f"Error deleting session messages: {e}")
+            return False
\ No newline at end of file
@@ -0,0 +1,91 @@
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Set
+from app.core.config import settings
+
+
+@lru_cache(maxsize=16)
+def _encoding_for(model: Optional[str]):
+    """tiktoken encoding of a model, cl100k_base for unknown models, None without tiktoken"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use and may be unavailable offline
+        print(f"Error loading tokenizer: {e}")
+        return None
+
+
+def _shingles(text: str, size: int = 3) -> Set[tuple]:
+    words = re.findall(r"\w+", text.lower())
+    return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+class ContextBuilder:
+    """Packs search results into a prompt context under a token budget.
+    
+    Results are taken best first. Those beyond the distance threshold and
+    near-duplicates of a chunk already taken are dropped, and chunks are added
+    while they fit the budget, so the number of chunks adapts to their length.
+    """
+    
+    separator = "\n\n"
+    
+    def __init__(self, model: Optional[str] = None):
+        self.encoding = _encoding_for(model)
+    
+    def count_tokens(self, text: str) -> int:
+        if self.encoding is None:
+            return len(text) // 4 + 1  # Rough estimate for English text
+        return len(self.encoding.encode(text, disallowed_special=()))
+    
+    def build(
+        self,
+        results: List[Dict[str, Any]],
+        token_budget: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        max_chunks: Optional[int] = None,
+        dedup_threshold: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Context text, token count and the results used, from results with ``document`` and ``distance``"""
+        token_budget = settings.context_token_budget if token_budget is None else token_budget
+        max_distance = settings.context_max_distance if max_distance is None else max_distance
+        dedup_threshold = settings.context_dedup_threshold if dedup_threshold is None else dedup_threshold
+        separator_tokens = self.count_tokens(self.separator)
+        
+        used, used_shingles = [], []
+        tokens = 0
+        stats = {"too_far": 0, "duplicates": 0, "over_budget": 0}
+        for result in sorted(results, key=lambda r: r.get("distance", 0)):
+            if max_chunks and len(used) >= max_chunks:
+                break
+            if max_distance is not None and result.get("distance", 0) > max_distance:
+                stats["too_far"] += 1
+                continue
+            
+            shingles = _shingles(result["document"])
+            if any(len(shingles & seen) / len(shingles | seen) >= dedup_threshold for seen in used_shingles):
+                stats["duplicates"] += 1
+                continue
+            
+            cost = self.count_tokens(result["document"]) + (separator_tokens if used else 0)
+            if tokens + cost > token_budget:
+                # A shorter, lower-ranked chunk may still fit
+                stats["over_budget"] += 1
+                continue
+            
+            used.append(result)
+            used_shingles.append(shingles)
+            tokens += cost
+        
+        return {
+            "context": self.separator.join(result["document"] for result in used),
+            "tokens": tokens,
+            "results": used,
+            "dropped": stats
+        }
@@ -1,17 +1,134 @@
 import os
-import fitz  # PyMuPDF
-from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session
-from app.models.document import Document
+import asyncio
+import hashlib
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, BinaryIO, Iterator, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.document import Document, DocumentTag
+from app.models.workflow import WorkflowComponent
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.extraction_cache import ExtractionCache
 import aiofiles
 import uuid
 
 
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all bulk extractions in this worker"""
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ProcessPoolExecutor(max_workers=settings.ingest_workers or os.cpu_count())
+    return _extraction_pool
+
+
+@lru_cache(maxsize=1)
+def extractor_version() -> str:
+    """Extractor identity in extraction cache keys.
+    
+    Bump the suffix when extraction output changes so cached results are not reused.
+    """
+    import fitz  # PyMuPDF, imported on first extraction to keep startup fast
+    
+    return f"pymupdf-{fitz.VersionBind}-1"
+
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_pdf_pages(file_path: str, text_mode: str = "text") -> Dict[str, Any]:
+    """Extract per-page text from a PDF file (module level so it can run in a process pool)"""
+    try:
+        import fitz  # PyMuPDF
+        
+        doc = fitz.open(file_path)
+        pages = [doc.load_page(page_num).get_text(text_mode) for page_num in range(len(doc))]
+        doc.close()
+        
+        return {
+            "pages": pages,
+            "text_content": "".join(pages),
+            "page_count": len(pages),
+            "success": True
+        }
+    except Exception as e:
+        return {
+            "pages": [],
+            "text_content": "",
+            "page_count": 0,
+            "success": False,
+            "error": str(e)
+        }
+
+
+def extract_pdf_pages_cached(file_path: str, content_hash: str = None, text_mode: str = "text") -> Dict[str, Any]:
+    """Extract per-page text, reusing the extraction cache for unchanged files"""
+    try:
+        content_hash = content_hash or hash_file(file_path)
+    except OSError:
+        # Let extraction report the missing or unreadable file
+        return extract_pdf_pages(file_path, text_mode)
+    
+    cache = ExtractionCache()
+    options = {"text_mode": text_mode}
+    cached = cache.get(content_hash, extractor_version(), options)
+    if cached is not None:
+        return {
+            "pages": cached["pages"],
+            "text_content": "".join(cached["pages"]),
+            "page_count": cached["page_count"],
+            "success": True,
+            "cached": True
+        }
+    
+    result = extract_pdf_pages(file_path, text_mode)
+    if result["success"]:
+        cache.set(content_hash, extractor_version(), options, result["pages"])
+    return result
+
+
+def chunk_text(text: str, chunk_size: int = None, chunk_overlap: int = None) -> List[str]:
+    """Split text into overlapping character windows"""
+    chunk_size = chunk_size or settings.chunk_size
+    chunk_overlap = settings.chunk_overlap if chunk_overlap is None else chunk_overlap
+    step = max(chunk_size - chunk_overlap, 1)
+    
+    chunks = []
+    for start in range(0, len(text), step):
+        chunk = text[start:start + chunk_size].strip()
+        if chunk:
+            chunks.append(chunk)
+        if start + chunk_size >= len(text):
+            break
+    return chunks
+
+
 class DocumentService:
     def __init__(self):
         self.upload_dir = settings.upload_dir
         os.makedirs(self.upload_dir, exist_ok=True)
+        self._embedding_service = None
+    
+    @property
+    def embedding_service(self):
+        # Created on first use so uploads work without an embedding provider configured
+        if self._embedding_service is None:
+            from app.services.embedding_service import EmbeddingService
+            self._embedding_service = EmbeddingService()
+        return self._embedding_service
     
     async def save_uploaded_file(self, file_content: bytes, original_filename: str) -> str:
         """Save uploaded file and return the file path"""
@@ -26,41 +143,66 @@ class DocumentService:
         
         return file_path
     
+    def save_file_stream(
+        self,
+        stream: BinaryIO,
+        original_filename: str,
+        chunk_size: int = 1024 * 1024,
+        max_size: Optional[int] = None
+    ) -> Tuple[str, int]:
+        """Copy a file-like object to the upload directory in chunks.
+        
+        Returns the file path and size. Raises ValueError if the stream exceeds
+        ``max_size`` (no limit if None); the partial file is removed.
+        """
+        file_extension = os.path.splitext(original_filename)[1]
+        file_path = os.path.join(self.upload_dir, f"{uuid.uuid4()}{file_extension}")
+        
+        size = 0
+        try:
+            with open(file_path, 'wb') as f:
+                while True:
+                    block = stream.read(chunk_size)
+                    if not block:
+                        break
+                    size += len(block)
+                    if max_size is not None and size > max_size:
+                        raise ValueError(f"{original_filename} exceeds the maximum file size")
+                    f.write(block)
+        except Exception:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        
+        return file_path, size
+    
+    def iter_pdf_entries(self, filename: str, stream: BinaryIO) -> Iterator[Tuple[str, BinaryIO]]:
+        """Yield (filename, stream) for a PDF upload or for each PDF inside a ZIP archive"""
+        if filename.lower().endswith('.zip'):
+            with zipfile.ZipFile(stream) as archive:
+                for entry in archive.infolist():
+                    if entry.is_dir() or not entry.filename.lower().endswith('.pdf'):
+                        continue
+                    with archive.open(entry) as entry_stream:
+                        yield os.path.basename(entry.filename), entry_stream
+        elif filename.lower().endswith('.pdf'):
+            yield filename, stream
+    
     def extract_text_from_pdf(self, file_path: str) -> Dict[str, Any]:
         """Extract text content from PDF file"""
-        try:
-            doc = fitz.open(file_path)
-            text_content = ""
-            page_count = len(doc)
-            
-            for page_num in range(page_count):
-                page = doc.load_page(page_num)
-                text_content += page.get_text()
-            
-            doc.close()
-            
-            return {
-                "text_content": text_content,
-                "page_count": page_count,
-                "success": True
-            }
-        except Exception as e:
-            return {
-                "text_content": "",
-                "page_count": 0,
-                "success": False,
-                "error": str(e)
-            }
+        return extract_pdf_pages_cached(file_path)
     
     async def create_document_record(
-        self, 
-        db: Session, 
-        filename: str, 
-        original_filename: str, 
-        file_path: str, 
-        file_size: int, 
+        self,
+        db: Session,
+        filename: str,
+        original_filename: str,
+        file_path: str,
+        file_size: int,
         mime_type: str,
-        workflow_id: Optional[int] = None
+        workflow_id: Optional[int] = None,
+        batch_id: Optional[str] = None,
+        tags: Optional[List[str]] = None
     ) -> Document:
         """Create a document record in the database"""
         document = Document(
@@ -69,7 +211,9 @@ class DocumentService:
             file_path=file_path,
             file_size=file_size,
             mime_type=mime_type,
-            workflow_id=workflow_id
+            workflow_id=workflow_id,
+            batch_id=batch_id,
+            tags=[DocumentTag(tag=tag) for tag in DocumentTag.normalize(tags)]
         )
         
         db.add(document)
@@ -78,33 +222,251 @@ class DocumentService:
         
         return document
     
+    def build_chunks(self, document: Document, pages: List[str]) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
+        """Chunk extracted pages into texts, metadatas and ids for a collection.
+        
+        Ids are content hashes of the page number and chunk text, so re-chunking
+        an unchanged page yields the same ids. Repeated chunks on a page are
+        kept once.
+        """
+        chunks, metadatas, ids = [], [], []
+        seen = set()
+        for page_num, page_text in enumerate(pages, 1):
+            for chunk in chunk_text(page_text):
+                chunk_id = f"doc{document.id}_{hashlib.sha256(f'{page_num}:{chunk}'.encode()).hexdigest()[:32]}"
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                chunks.append(chunk)
+                metadatas.append({
+                    "document_id": document.id,
+                    "page": page_num,
+                    "filename": document.original_filename
+                })
+                ids.append(chunk_id)
+        
+        return chunks, metadatas, ids
+    
+    def get_knowledge_base_config(self, db: Session, workflow_id: int) -> Dict[str, Any]:
+        """Configuration of a workflow's knowledge base component, used when creating its collection"""
+        component = db.query(WorkflowComponent).filter(
+            WorkflowComponent.workflow_id == workflow_id,
+            WorkflowComponent.component_type == "knowledge_base"
+        ).first()
+        return (component.configuration or {}) if component else {}
+    
+    def index_document(
+        self,
+        document: Document,
+        pages: List[str],
+        collection_config: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Chunk extracted pages and sync them into the workflow's collection.
+        
+        Only chunks that changed since the last indexing are embedded. Documents
+        that don't belong to a workflow have nowhere to be indexed and count as
+        successfully processed.
+        """
+        if document.workflow_id is None:
+            return True
+        
+        chunks, metadatas, ids = self.build_chunks(document, pages)
+        
+        # Even with no chunks, sync so a reprocessed document's old chunks are removed
+        result = self.embedding_service.sync_document_chunks(
+            collection_name=f"workflow_{document.workflow_id}",
+            document_ids=[document.id],
+            documents=chunks,
+            metadatas=metadatas,
+            ids=ids,
+            collection_config=collection_config
+        )
+        return result is not None
+    
+    def _apply_extraction(self, db: Session, document: Document, extraction_result: Dict[str, Any]) -> bool:
+        """Store extraction results, index the document and set its status"""
+        if extraction_result["success"]:
+            document.text_content = extraction_result["text_content"]
+            document.page_count = extraction_result["page_count"]
+            collection_config = (
+                self.get_knowledge_base_config(db, document.workflow_id) if document.workflow_id else None
+            )
+            success = self.index_document(document, extraction_result["pages"], collection_config)
+        else:
+            success = False
+        
+        document.embedding_status = "completed" if success else "failed"
+        db.commit()
+        return success
+    
     async def process_document(self, db: Session, document_id: int) -> bool:
-        """Process document: extract text and update record"""
+        """Process document: extract text, index it and update record"""
         document = db.query(Document).filter(Document.id == document_id).first()
         if not document:
             return False
         
-        # Extract text from PDF
+        # Extract text from PDF, skipped when the file's extraction is cached
         extraction_result = self.extract_text_from_pdf(document.file_path)
         
-        if extraction_result["success"]:
-            document.text_content = extraction_result["text_content"]
-            document.page_count = extraction_result["page_count"]
-            document.embedding_status = "completed"
-        else:
-            document.embedding_status = "failed"
+        return self._apply_extraction(db, document, extraction_result)
+    
+    async def process_documents_bulk(self, document_ids: List[int]) -> None:
+        """Extract and index many documents with bounded concurrency.
+        
+        Extraction runs in the shared process pool and indexing in the default
+        thread pool. Each document uses its own session and records its
+        progress in ``embedding_status``.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(settings.ingest_max_concurrency)
         
+        async def process_one(document_id: int):
+            async with semaphore:
+                db = SessionLocal()
+                try:
+                    document = db.query(Document).filter(Document.id == document_id).first()
+                    if not document:
+                        return
+                    document.embedding_status = "processing"
+                    db.commit()
+                    
+                    extraction_result = await loop.run_in_executor(
+                        get_extraction_pool(), extract_pdf_pages_cached, document.file_path
+                    )
+                    await loop.run_in_executor(
+                        None, self._apply_extraction, db, document, extraction_result
+                    )
+                except Exception as e:
+                    db.rollback()
+                    print(f"Error processing document {document_id}: {e}")
+                    db.query(Document).filter(Document.id == document_id).update(
+                        {"embedding_status": "failed"}
+                    )
+                    db.commit()
+                finally:
+                    db.close()
+        
+        await asyncio.gather(*(process_one(document_id) for document_id in document_ids))
+    
+    def get_batch_documents(self, db: Session, batch_id: str) -> list[Document]:
+        """Get all documents uploaded in a batch"""
+        return db.query(Document).filter(Document.batch_id == batch_id).order_by(Document.id).all()
+    
+    async def get_batch_documents_async(self, db: AsyncSession, batch_id: str) -> list[Document]:
+        """Async variant of get_batch_documents"""
+        result = await db.execute(select(Document).where(Document.batch_id == batch_id).order_by(Document.id))
+        return list(result.scalars())
+    
+    def set_document_tags(self, db: Session, document: Document, tags: List[str]) -> Document:
+        """Replace a document's tags"""
+        wanted = DocumentTag.normalize(tags)
+        document.tags = [t for t in document.tags if t.tag in wanted] + [
+            DocumentTag(tag=tag) for tag in wanted if tag not in {t.tag for t in document.tags}
+        ]
         db.commit()
-        return extraction_result["success"]
+        db.refresh(document)
+        return document
     
     def get_document_by_id(self, db: Session, document_id: int) -> Optional[Document]:
         """Get document by ID"""
         return db.query(Document).filter(Document.id == document_id).first()
     
+    async def get_document_by_id_async(self, db: AsyncSession, document_id: int) -> Optional[Document]:
+        """Async variant of get_document_by_id"""
+        # Async sessions cannot lazy-load, so load the tags up front
+        return await db.get(Document, document_id, options=[selectinload(Document.tags)])
+    
     def get_documents_by_workflow(self, db: Session, workflow_id: int) -> list[Document]:
         """Get all documents for a specific workflow"""
         return db.query(Document).filter(Document.workflow_id == workflow_id).all()
     
+    async def get_documents_by_workflow_async(self, db: AsyncSession, workflow_id: int) -> list[Document]:
+        """Async variant of get_documents_by_workflow"""
+        result = await db.execute(select(Document).where(Document.workflow_id == workflow_id))
+        return list(result.scalars())
+    
     def get_all_documents(self, db: Session) -> list[Document]:
         """Get all documents"""
-        return db.query(Document).all() 
\ No newline at end of file
+        return db.query(Document).all()
+    
+    async def get_all_documents_async(self, db: AsyncSession) -> list[Document]:
+        """Async variant of get_all_documents"""
+        result = await db.execute(select(Document))
+        return list(result.scalars())
+    
+    def list_documents(
+        self,
+        db: Session,
+        workflow_id: Optional[int] = None,
+        embedding_status: Optional[str] = None,
+        uploaded_after: Optional[datetime] = None,
+        uploaded_before: Optional[datetime] = None,
+        cursor: Optional[int] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """List documents newest first using keyset pagination on id.
+        
+        ``cursor`` is the ``next_cursor`` of the previous page. The total is the
+        number of documents matching the filters, independent of the cursor.
+        """
+        filters = self._list_filters(workflow_id, embedding_status, uploaded_after, uploaded_before)
+        
+        # COUNT over the filtered index range only, no subquery wrapping
+        total = db.query(func.count(Document.id)).filter(*filters).scalar()
+        
+        query = db.query(Document).filter(*filters)
+        if cursor is not None:
+            query = query.filter(Document.id < cursor)
+        
+        # Fetch one extra row to know whether another page exists
+        documents = query.order_by(Document.id.desc()).limit(limit + 1).all()
+        return self._page(documents, total, limit)
+    
+    async def list_documents_async(
+        self,
+        db: AsyncSession,
+        workflow_id: Optional[int] = None,
+        embedding_status: Optional[str] = None,
+        uploaded_after: Optional[datetime] = None,
+        uploaded_before: Optional[datetime] = None,
+        cursor: Optional[int] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """Async variant of list_documents"""
+        filters = self._list_filters(workflow_id, embedding_status, uploaded_after, uploaded_before)
+        total = (await db.execute(select(func.count(Document.id)).where(*filters))).scalar()
+        
+        stmt = select(Document).where(*filters)
+        if cursor is not None:
+            stmt = stmt.where(Document.id < cursor)
+        
+        result = await db.execute(stmt.order_by(Document.id.desc()).limit(limit + 1))
+        return self._page(list(result.scalars()), total, limit)
+    
+    def _list_filters(
+        self,
+        workflow_id: Optional[int],
+        embedding_status: Optional[str],
+        uploaded_after: Optional[datetime],
+        uploaded_before: Optional[datetime]
+    ) -> list:
+        filters = []
+        if workflow_id is not None:
+            filters.append(Document.workflow_id == workflow_id)
+        if embedding_status:
+            filters.append(Document.embedding_status == embedding_status)
+        if uploaded_after:
+            filters.append(Document.created_at >= uploaded_after)
+        if uploaded_before:
+            filters.append(Document.created_at < uploaded_before)
+        return filters
+    
+    def _page(self, documents: list[Document], total: int, limit: int) -> Dict[str, Any]:
+        has_more = len(documents) > limit
+        documents = documents[:limit]
+        
+        return {
+            "items": documents,
+            "total": total,
+            "next_cursor": documents[-1].id if has_more else None
+        }
@@ -1,57 +1,324 @@
-import chromadb
-from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
 from app.core.config import settings
-import openai
+from app.services.retrieval_cache import collection_versions, retrieval_cache
+from app.core.metrics import track_provider_call, record_tokens, embedding_batch_size, vector_query_duration
+from app.core.tracing import traced, set_span_attributes
+from app.services.providers import provider_registry
 import os
+import json
+import time
+import uuid
+import fcntl
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# chromadb, openai and numpy are imported on first use to keep worker startup fast
+if TYPE_CHECKING:
+    import chromadb
+    from app.services.numpy_vector_store import NumpyVectorStore
+
+
+class _SharedJson:
+    """A JSON object in the Chroma directory shared by every process.
+    
+    Updates hold an exclusive file lock (and a thread lock) around the
+    read-modify-write, and replace the file atomically.
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._lock = threading.Lock()
+    
+    @property
+    def path(self) -> str:
+        return os.path.join(settings.chroma_persist_directory, self.filename)
+    
+    def read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @contextmanager
+    def update(self):
+        os.makedirs(settings.chroma_persist_directory, exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            data = self.read()
+            yield data
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+
+# Deleted vector counts per collection since its last compaction
+_tombstones = _SharedJson("tombstones.json")
+# Collection name -> Chroma collection holding it, switched when it is compacted
+_aliases = _SharedJson("collection_aliases.json")
+
+
+@contextmanager
+def _compaction_lock(collection_name: str):
+    """Yields True while holding a collection's compaction lock, False if another process holds it"""
+    os.makedirs(settings.chroma_persist_directory, exist_ok=True)
+    with open(os.path.join(settings.chroma_persist_directory, f"compact_{collection_name}.lock"), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+
+# Open collection handles and their live counts, by collection name. Shared by
+# every EmbeddingService in the process (one is created per request) and tied to
+# the collection's version, so a write or delete by another process invalidates them.
+_collection_handles: Dict[str, Dict[str, Any]] = {}
+_collection_handles_lock = threading.Lock()
+
+# Shared by all requests so fan-out searches don't spawn threads per query
+_search_pool = ThreadPoolExecutor(max_workers=settings.search_fanout_workers, thread_name_prefix="search")
+
+def _backend_of(collection) -> str:
+    return "chroma" if type(collection).__module__.startswith("chromadb") else "numpy"
+
+
+# HNSW parameters by expected collection size (chunks). Larger graphs need more
+# links per node and wider search beams to keep recall up; Chroma's defaults are
+# M=16, construction_ef=100, search_ef=10.
+HNSW_PRESETS = {
+    "small": {"M": 16, "construction_ef": 100, "search_ef": 50},    # up to ~10k chunks
+    "medium": {"M": 24, "construction_ef": 200, "search_ef": 100},  # up to ~250k chunks
+    "large": {"M": 48, "construction_ef": 400, "search_ef": 200},   # beyond that
+}
+
+
+def hnsw_metadata(config: Dict[str, Any]) -> Dict[str, int]:
+    """Chroma ``hnsw:*`` metadata for a knowledge base configuration.
+    
+    ``hnsw_preset`` (or ``settings.hnsw_default_preset``) picks a size preset
+    and ``hnsw_m``, ``hnsw_construction_ef`` and ``hnsw_search_ef`` override
+    single values. With neither, Chroma's defaults apply.
+    """
+    params = {}
+    preset = config.get("hnsw_preset") or settings.hnsw_default_preset
+    if preset:
+        if preset in HNSW_PRESETS:
+            params.update(HNSW_PRESETS[preset])
+        else:
+            print(f"Unknown HNSW preset '{preset}', using defaults")
+    
+    for key, param in (("hnsw_m", "M"), ("hnsw_construction_ef", "construction_ef"), ("hnsw_search_ef", "search_ef")):
+        if config.get(key):
+            params[param] = int(config[key])
+    return {f"hnsw:{param}": value for param, value in params.items()}
 
 
 class EmbeddingService:
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=settings.openai_api_key)
-        self.chroma_client = chromadb.PersistentClient(
-            path=settings.chroma_persist_directory,
-            settings=Settings(anonymized_telemetry=False)
-        )
+        self._chroma_client = None
+        self._numpy_store = None
     
-    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Create embeddings for a list of texts using OpenAI"""
-        try:
-            response = self.openai_client.embeddings.create(
-                model=settings.openai_embedding_model,
-                input=texts
+    @property
+    def chroma_client(self) -> "chromadb.PersistentClient":
+        # Created on first use so NumPy-only workers never open Chroma
+        if self._chroma_client is None:
+            import chromadb
+            from chromadb.config import Settings
+            
+            self._chroma_client = chromadb.PersistentClient(
+                path=settings.chroma_persist_directory,
+                settings=Settings(anonymized_telemetry=False)
             )
-            return [embedding.embedding for embedding in response.data]
+        return self._chroma_client
+    
+    @property
+    def numpy_store(self) -> "NumpyVectorStore":
+        if self._numpy_store is None:
+            from app.services.numpy_vector_store import NumpyVectorStore
+            
+            self._numpy_store = NumpyVectorStore(
+                settings.numpy_store_directory,
+                dtype=settings.numpy_store_dtype,
+                rerank_factor=settings.numpy_store_rerank_factor
+            )
+        return self._numpy_store
+    
+    def get_backend(self, collection_name: str, backend: Optional[str] = None) -> str:
+        """Vector backend holding a collection: "chroma" or "numpy".
+        
+        An existing collection keeps the backend it was created with; a new one
+        uses ``backend`` or ``settings.vector_backend``.
+        """
+        if self.numpy_store.has_collection(collection_name):
+            return "numpy"
+        if backend is None and settings.vector_backend == "numpy":
+            physical_name = self._physical_name(collection_name)
+            if physical_name in [c.name for c in self.chroma_client.list_collections()]:
+                return "chroma"
+        return backend or settings.vector_backend
+    
+    def _physical_name(self, collection_name: str) -> str:
+        """Name of the store collection holding a collection; compaction moves it to a new one"""
+        return _aliases.read().get(collection_name, collection_name)
+    
+    def _client_for(self, collection_name: str, backend: Optional[str] = None):
+        if self.get_backend(collection_name, backend) == "numpy":
+            return self.numpy_store
+        return self.chroma_client
+    
+    def create_embeddings(
+        self,
+        texts: List[str],
+        dimensions: Optional[int] = None,
+        provider: str = "openai",
+        model: Optional[str] = None,
+        api_key: Optional[str] = None
+    ) -> List[List[float]]:
+        """Create embeddings for a list of texts, batching large inputs.
+        
+        ``provider`` is "openai" or a registered OpenAI-compatible provider,
+        ``model`` defaults to its embedding model and ``api_key`` to its key.
+        ``dimensions`` shortens the output vectors (text-embedding-3 models only).
+        """
+        try:
+            client = provider_registry.client(provider, api_key)
+            if not client:
+                print(f"Error creating embeddings: provider {provider} not configured")
+                return []
+            model = model or provider_registry.config(provider)["embedding_model"]
+            options = {"dimensions": dimensions} if dimensions else {}
+            embeddings = []
+            for start in range(0, len(texts), settings.embedding_batch_size):
+                batch = texts[start:start + settings.embedding_batch_size]
+                embedding_batch_size.observe(len(batch))
+                with track_provider_call(provider, "embeddings"):
+                    response = client.embeddings.create(
+                        model=model,
+                        input=batch,
+                        **options
+                    )
+                if response.usage:
+                    record_tokens(model, response.usage.prompt_tokens)
+                embeddings.extend(embedding.embedding for embedding in response.data)
+            return embeddings
         except Exception as e:
             print(f"Error creating embeddings: {e}")
             return []
     
-    def create_collection(self, collection_name: str) -> chromadb.Collection:
-        """Create or get a ChromaDB collection"""
+    def create_collection(self, collection_name: str, config: Optional[Dict[str, Any]] = None) -> "chromadb.Collection":
+        """Create or get a collection.
+        
+        ``config`` is the knowledge base component configuration. For a new
+        collection, ``vector_backend`` selects the backend, ``vector_dtype`` the
+        NumPy storage type (float32, float16 or int8), ``embedding_dimensions``
+        the embedding size and ``embedding_provider`` (with ``embedding_model``)
+        an OpenAI-compatible provider to embed with. These are recorded in the
+        collection metadata so every later embedding for it matches. HNSW parameters are taken from
+        the config as described in ``hnsw_metadata``; like the other options
+        they only affect collections that do not exist yet.
+        """
+        config = config or {}
+        metadata = {"hnsw:space": "cosine", **hnsw_metadata(config)}
+        dimensions = config.get("embedding_dimensions") or settings.openai_embedding_dimensions
+        if dimensions:
+            metadata["embedding_dimensions"] = int(dimensions)
+        provider = (config.get("embedding_provider") or "openai").lower()
+        if provider != "openai":
+            metadata["embedding_provider"] = provider
+            model = config.get("embedding_model") or (provider_registry.config(provider) or {}).get("embedding_model")
+            if model:
+                metadata["embedding_model"] = model
+        if config.get("vector_dtype"):
+            metadata["numpy:dtype"] = config["vector_dtype"]
+        version = collection_versions.get(collection_name)
+        with _collection_handles_lock:
+            entry = _collection_handles.get(collection_name)
+            if entry and entry["version"] == version:
+                return entry["collection"]
+        
         try:
-            return self.chroma_client.get_or_create_collection(
-                name=collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
+            client = self._client_for(collection_name, config.get("vector_backend"))
+            # Chroma's get_or_create_collection rewrites differing metadata, which
+            # would drop the settings an existing collection was created with
+            physical_name = self._physical_name(collection_name)
+            try:
+                collection = client.get_collection(name=physical_name)
+            except ValueError:
+                collection = client.get_or_create_collection(name=physical_name, metadata=metadata)
+            
+            with _collection_handles_lock:
+                _collection_handles[collection_name] = {"version": version, "collection": collection, "count": None}
+            return collection
         except Exception as e:
             print(f"Error creating collection: {e}")
             return None
     
+    def get_collection(self, collection_name: str) -> Optional["chromadb.Collection"]:
+        """An existing collection, or None; unlike ``create_collection`` it never creates one"""
+        version = collection_versions.get(collection_name)
+        with _collection_handles_lock:
+            entry = _collection_handles.get(collection_name)
+            if entry and entry["version"] == version:
+                return entry["collection"]
+        
+        try:
+            collection = self._client_for(collection_name).get_collection(name=self._physical_name(collection_name))
+        except ValueError:
+            return None
+        with _collection_handles_lock:
+            _collection_handles[collection_name] = {"version": version, "collection": collection, "count": None}
+        return collection
+    
+    def _record_write(self, collection_name: str, count_delta: Optional[int]) -> None:
+        """Bump a collection's version after a write and keep its cached handle and count current"""
+        version = collection_versions.bump(collection_name)
+        with _collection_handles_lock:
+            entry = _collection_handles.get(collection_name)
+            if not entry:
+                return
+            if entry["version"] == version - 1:
+                # No other writer in between: the handle is still valid and the count exact
+                entry["version"] = version
+                if entry["count"] is not None:
+                    entry["count"] = entry["count"] + count_delta if count_delta is not None else None
+            else:
+                del _collection_handles[collection_name]
+    
+    def _forget_collection(self, collection_name: str) -> None:
+        with _collection_handles_lock:
+            _collection_handles.pop(collection_name, None)
+    
+    def _embedding_target(self, collection) -> Tuple[Optional[int], str, Optional[str]]:
+        """``create_embeddings`` arguments matching a collection: dimensions, provider and model"""
+        metadata = collection.metadata or {}
+        return (
+            metadata.get("embedding_dimensions"),
+            metadata.get("embedding_provider", "openai"),
+            metadata.get("embedding_model")
+        )
+    
     def add_documents_to_collection(
         self, 
         collection_name: str, 
         documents: List[str], 
         metadatas: List[Dict[str, Any]], 
-        ids: List[str]
+        ids: List[str],
+        collection_config: Optional[Dict[str, Any]] = None
     ) -> bool:
-        """Add documents to a ChromaDB collection"""
+        """Add documents to a collection"""
         try:
-            collection = self.create_collection(collection_name)
+            collection = self.create_collection(collection_name, collection_config)
             if not collection:
                 return False
             
-            # Create embeddings
-            embeddings = self.create_embeddings(documents)
+            # Create embeddings, with the knowledge base's own key if it has one
+            embeddings = self.create_embeddings(
+                documents, *self._embedding_target(collection), api_key=(collection_config or {}).get("api_key")
+            )
             if not embeddings:
                 return False
             
@@ -62,70 +329,408 @@ class EmbeddingService:
                 metadatas=metadatas,
                 ids=ids
             )
+            # Chroma skips ids it already holds, so the added count is not known
+            self._record_write(collection_name, None)
             return True
         except Exception as e:
             print(f"Error adding documents to collection: {e}")
             return False
     
+    def sync_document_chunks(
+        self,
+        collection_name: str,
+        document_ids: List[int],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        collection_config: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, int]]:
+        """Make the collection hold exactly the given chunks for these documents.
+        
+        Chunk ids are content hashes, so a chunk whose id is already stored is
+        unchanged and left alone. Only new chunks are embedded and added, and
+        stored chunks of these documents that are no longer present are deleted.
+        Returns added/removed/unchanged counts, or None on failure.
+        """
+        try:
+            collection = self.create_collection(collection_name, collection_config)
+            if not collection:
+                return None
+            
+            existing = collection.get(
+                where={"document_id": {"$in": list(document_ids)}},
+                include=[]
+            )
+            existing_ids = set(existing["ids"])
+            new_ids = set(ids)
+            
+            removed_ids = list(existing_ids - new_ids)
+            if removed_ids:
+                collection.delete(ids=removed_ids)
+                self.record_tombstones(collection_name, len(removed_ids))
+                self._record_write(collection_name, -len(removed_ids))
+            
+            added = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing_ids]
+            if added:
+                embeddings = self.create_embeddings(
+                    [documents[i] for i in added],
+                    *self._embedding_target(collection),
+                    api_key=(collection_config or {}).get("api_key")
+                )
+                if not embeddings:
+                    return None
+                
+                collection.add(
+                    documents=[documents[i] for i in added],
+                    embeddings=embeddings,
+                    metadatas=[metadatas[i] for i in added],
+                    ids=[ids[i] for i in added]
+                )
+                self._record_write(collection_name, len(added))
+            
+            return {
+                "added": len(added),
+                "removed": len(removed_ids),
+                "unchanged": len(ids) - len(added)
+            }
+        except Exception as e:
+            print(f"Error syncing document chunks: {e}")
+            return None
+    
+    @traced("vector.query")
+    def _query_collection(
+        self,
+        collection,
+        query_embedding: List[float],
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        where_document: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Nearest chunks of one collection to a query embedding"""
+        filters = {}
+        if where:
+            filters["where"] = where
+        if where_document:
+            filters["where_document"] = where_document
+        start = time.perf_counter()
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            include=["documents", "metadatas", "distances"],
+            **filters
+        )
+        vector_query_duration.labels(_backend_of(collection)).observe(time.perf_counter() - start)
+        
+        # Format results
+        formatted_results = []
+        if results["documents"] and results["documents"][0]:
+            for i in range(len(results["documents"][0])):
+                formatted_results.append({
+                    "document": results["documents"][0][i],
+                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
+                    "distance": results["distances"][0][i] if results["distances"] else 0
+                })
+        return formatted_results
+    
+    @traced("retrieval.search")
     def search_similar_documents(
         self, 
         collection_name: str, 
         query: str, 
-        n_results: int = 5
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+        api_key: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Search for similar documents in a collection"""
+        """Search for similar documents in a collection.
+        
+        ``where`` and ``where_document`` are Chroma metadata and text predicates,
+        applied inside the index so only matching chunks are ranked. Results are
+        cached per collection version, so repeated questions skip both the
+        query embedding and the index search until the collection changes.
+        ``api_key`` replaces the embedding provider's key for the query.
+        """
         try:
+            cache_key = retrieval_cache.make_key(
+                collection_name, collection_versions.get(collection_name), query, n_results, where, where_document
+            )
+            cached = retrieval_cache.get(cache_key)
+            set_span_attributes(**{"retrieval.collection": collection_name, "retrieval.cache_hit": cached is not None})
+            if cached is not None:
+                return cached
+            start = time.perf_counter()
+            
             collection = self.create_collection(collection_name)
             if not collection:
                 return []
             
             # Create embedding for query
-            query_embeddings = self.create_embeddings([query])
+            query_embeddings = self.create_embeddings([query], *self._embedding_target(collection), api_key=api_key)
             if not query_embeddings:
                 return []
             
-            # Search
+            results = self._query_collection(collection, query_embeddings[0], n_results, where, where_document)
+            retrieval_cache.set(cache_key, results, (time.perf_counter() - start) * 1000)
+            return results
+        except Exception as e:
+            print(f"Error searching documents: {e}")
+            return []
+    
+    def search_batch(
+        self,
+        collection_name: str,
+        queries: List[str],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Search a collection for many queries at once.
+        
+        All queries are embedded in batched requests and answered by a single
+        ``collection.query`` call. Returns Chroma's columnar result, one list
+        per query under ``ids`` and each included field, or None on failure.
+        """
+        try:
+            collection = self.create_collection(collection_name)
+            if not collection:
+                return None
+            
+            query_embeddings = self.create_embeddings(queries, *self._embedding_target(collection))
+            if len(query_embeddings) != len(queries):
+                return None
+            
+            filters = {}
+            if where:
+                filters["where"] = where
+            if where_document:
+                filters["where_document"] = where_document
+            start = time.perf_counter()
             results = collection.query(
                 query_embeddings=query_embeddings,
                 n_results=n_results,
-                include=["documents", "metadatas", "distances"]
+                include=include if include is not None else ["documents", "metadatas", "distances"],
+                **filters
             )
-            
-            # Format results
-            formatted_results = []
-            if results["documents"] and results["documents"][0]:
-                for i in range(len(results["documents"][0])):
-                    formatted_results.append({
-                        "document": results["documents"][0][i],
-                        "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                        "distance": results["distances"][0][i] if results["distances"] else 0
-                    })
-            
-            return formatted_results
+            vector_query_duration.labels(_backend_of(collection)).observe(time.perf_counter() - start)
+            return results
         except Exception as e:
             print(f"Error searching documents: {e}")
+            return None
+    
+    @traced("retrieval.search_collections")
+    def search_collections(
+        self,
+        collection_names: List[str],
+        query: str,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+        api_key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Search several collections concurrently and merge them into one global top-k.
+        
+        The query is embedded once per distinct embedding setup among the
+        collections (with ``api_key`` if given), and the per-collection queries
+        run in parallel, so latency is that of the slowest collection. Each
+        result carries its ``collection``. A collection that fails to answer is
+        skipped.
+        """
+        try:
+            collections = {}
+            for name in dict.fromkeys(collection_names):
+                collection = self.create_collection(name)
+                if collection:
+                    collections[name] = collection
+            if not collections:
+                return []
+            
+            embeddings = {}
+            for target in {self._embedding_target(c) for c in collections.values()}:
+                query_embeddings = self.create_embeddings([query], *target, api_key=api_key)
+                if not query_embeddings:
+                    return []
+                embeddings[target] = query_embeddings[0]
+            
+            # Each query runs in a copy of this context so its span joins the trace
+            futures = {
+                name: _search_pool.submit(
+                    contextvars.copy_context().run,
+                    self._query_collection,
+                    collection,
+                    embeddings[self._embedding_target(collection)],
+                    n_results,
+                    where,
+                    where_document
+                )
+                for name, collection in collections.items()
+            }
+            
+            merged = []
+            for name, future in futures.items():
+                try:
+                    for result in future.result():
+                        result["collection"] = name
+                        merged.append(result)
+                except Exception as e:
+                    print(f"Error searching collection {name}: {e}")
+            
+            # Distances are comparable across collections that share a space and model
+            merged.sort(key=lambda result: result["distance"])
+            return merged[:n_results]
+        except Exception as e:
+            print(f"Error searching collections: {e}")
             return []
     
     def delete_collection(self, collection_name: str) -> bool:
         """Delete a ChromaDB collection"""
         try:
-            self.chroma_client.delete_collection(name=collection_name)
+            self._client_for(collection_name).delete_collection(name=self._physical_name(collection_name))
+            if collection_name in _aliases.read():
+                with _aliases.update() as aliases:
+                    aliases.pop(collection_name, None)
+            self.reset_tombstones(collection_name)
+            self._forget_collection(collection_name)
+            collection_versions.bump(collection_name)
             return True
         except Exception as e:
             print(f"Error deleting collection: {e}")
             return False
     
+    def delete_document_vectors(self, collection_name: str, document_id: int) -> int:
+        """Delete all chunks of a document from a collection, returning how many were removed"""
+        try:
+            # A workflow that never indexed anything has no collection to create
+            collection = self.get_collection(collection_name)
+            if not collection:
+                return 0
+            
+            ids = collection.get(where={"document_id": document_id}, include=[])["ids"]
+            if ids:
+                collection.delete(ids=ids)
+                self.record_tombstones(collection_name, len(ids))
+                self._record_write(collection_name, -len(ids))
+            return len(ids)
+        except Exception as e:
+            print(f"Error deleting document vectors: {e}")
+            return 0
+    
+    def record_tombstones(self, collection_name: str, count: int) -> None:
+        """Count vectors deleted from a collection since it was last compacted.
+        
+        HNSW deletes only mark elements, so deleted vectors keep occupying the
+        index until it is rebuilt.
+        """
+        with _tombstones.update() as tombstones:
+            tombstones[collection_name] = tombstones.get(collection_name, 0) + count
+    
+    def get_tombstones(self) -> Dict[str, int]:
+        """Deleted vector counts per collection since their last compaction"""
+        return _tombstones.read()
+    
+    def reset_tombstones(self, collection_name: str) -> None:
+        if collection_name in _tombstones.read():
+            with _tombstones.update() as tombstones:
+                tombstones.pop(collection_name, None)
+    
+    def _copy_vectors(self, source, target, batch_size: int, ids: Optional[List[str]] = None) -> set:
+        """Copy stored vectors, all of them or ``ids``, without re-embedding; returns the ids copied"""
+        include = ["documents", "metadatas", "embeddings"]
+        if ids is None:
+            batches = (source.get(offset=offset, limit=batch_size, include=include)
+                       for offset in range(0, source.count(), batch_size))
+        else:
+            batches = (source.get(ids=ids[start:start + batch_size], include=include)
+                       for start in range(0, len(ids), batch_size))
+        copied = set()
+        for batch in batches:
+            if batch["ids"]:
+                target.add(
+                    ids=batch["ids"],
+                    documents=batch["documents"],
+                    metadatas=batch["metadatas"],
+                    embeddings=batch["embeddings"]
+                )
+                copied.update(batch["ids"])
+        return copied
+    
+    def compact_collection(self, collection_name: str, batch_size: int = 1000) -> bool:
+        """Rebuild a collection's index without its deleted elements.
+        
+        Live vectors are copied, not re-embedded, into a new Chroma collection.
+        The collection's alias is then switched to the copy and only after that
+        is the old one dropped, so searches always find a complete collection
+        and a crash leaves the original in place. Writes that reached the old
+        collection while it was copied are replayed onto the copy. One process
+        compacts a collection at a time; others skip it.
+        """
+        with _compaction_lock(collection_name) as acquired:
+            if not acquired:
+                return False
+            if self.numpy_store.has_collection(collection_name):
+                try:
+                    self.numpy_store.get_collection(collection_name).compact()
+                    self.reset_tombstones(collection_name)
+                    return True
+                except Exception as e:
+                    print(f"Error compacting collection: {e}")
+                    return False
+            
+            try:
+                old_name = self._physical_name(collection_name)
+                old = self.chroma_client.get_collection(name=old_name)
+                # Copies left behind by a compaction that did not finish
+                for stale in self.chroma_client.list_collections():
+                    if stale.name.startswith(f"{collection_name}_compact_") and stale.name != old_name:
+                        self.chroma_client.delete_collection(name=stale.name)
+                
+                new_name = f"{collection_name}_compact_{uuid.uuid4().hex[:8]}"
+                new = self.chroma_client.create_collection(name=new_name, metadata=old.metadata)
+                copied = self._copy_vectors(old, new, batch_size)
+                
+                with _aliases.update() as aliases:
+                    aliases[collection_name] = new_name
+                # Handles to the old collection, here or in other processes, must be reopened
+                self._forget_collection(collection_name)
+                collection_versions.bump(collection_name)
+                
+                # Chunks added to or deleted from the old collection during the copy
+                live = set(old.get(include=[])["ids"])
+                missing = list(live - copied)
+                if missing:
+                    self._copy_vectors(old, new, batch_size, missing)
+                removed = list(copied - live)
+                if removed:
+                    new.delete(ids=removed)
+                
+                self.chroma_client.delete_collection(name=old_name)
+                self.reset_tombstones(collection_name)
+                return True
+            except Exception as e:
+                print(f"Error compacting collection: {e}")
+                return False
+    
     def get_collection_info(self, collection_name: str) -> Optional[Dict[str, Any]]:
-        """Get information about a collection"""
+        """Get information about a collection, None if it does not exist"""
         try:
-            collection = self.create_collection(collection_name)
+            collection = self.get_collection(collection_name)
             if not collection:
                 return None
             
-            count = collection.count()
+            # Served from the cached count, kept current by this process's writes
+            with _collection_handles_lock:
+                entry = _collection_handles.get(collection_name)
+                count = entry["count"] if entry and entry["collection"] is collection else None
+            if count is None:
+                count = collection.count()
+                with _collection_handles_lock:
+                    entry = _collection_handles.get(collection_name)
+                    if entry and entry["collection"] is collection:
+                        entry["count"] = count
             return {
                 "name": collection_name,
                 "count": count,
+                "version": collection_versions.get(collection_name),
                 "metadata": collection.metadata
             }
         except Exception as e:
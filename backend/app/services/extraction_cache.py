@@ -0,0 +1,54 @@
+import os
+import json
+import uuid
+import hashlib
+from typing import Dict, Any, Optional
+from app.core.config import settings
+
+
+class ExtractionCache:
+    """On-disk cache of PDF extraction results.
+    
+    Entries are keyed by (file SHA-256, extractor version, extraction options)
+    and hold the per-page text and page count. Files are written atomically, so
+    the cache can be shared by worker processes and API workers.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir if cache_dir is not None else settings.extraction_cache_dir
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_dir)
+    
+    def _path(self, content_hash: str, extractor_version: str, options: Dict[str, Any]) -> str:
+        key = f"{content_hash}:{extractor_version}:{json.dumps(options, sort_keys=True)}"
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        # Two-level fan-out keeps directories small for large corpora
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+    
+    def get(self, content_hash: str, extractor_version: str, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached pages and page count, or None on a miss"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(content_hash, extractor_version, options)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def set(self, content_hash: str, extractor_version: str, options: Dict[str, Any], pages: list) -> None:
+        """Store the per-page text of a successful extraction"""
+        if not self.enabled:
+            return
+        path = self._path(content_hash, extractor_version, options)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"pages": pages, "page_count": len(pages)}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing extraction cache: {e}")
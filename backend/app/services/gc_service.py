@@ -0,0 +1,124 @@
+import os
+import fcntl
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Set
+from sqlalchemy.orm import Session
+from app.models.workflow import Workflow, WorkflowComponent
+from app.models.document import Document
+from app.models.chat import ChatMessage
+from app.core.config import settings
+
+
+class GarbageCollectionService:
+    """Removes vectors, files and rows that no longer belong to live data.
+    
+    Deleted documents lose their vectors immediately. Soft-deleted workflows are
+    purged once their grace period has passed, and collections carrying many
+    deleted vectors are compacted.
+    """
+    
+    def __init__(self):
+        self._embedding_service = None
+    
+    @property
+    def embedding_service(self):
+        if self._embedding_service is None:
+            from app.services.embedding_service import EmbeddingService
+            self._embedding_service = EmbeddingService()
+        return self._embedding_service
+    
+    def _remove_file(self, file_path: str) -> None:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+    
+    def delete_document(self, db: Session, document: Document) -> None:
+        """Delete a document's vectors, file and row"""
+        if document.workflow_id is not None and document.embedding_status != "pending":
+            self.embedding_service.delete_document_vectors(
+                collection_name=f"workflow_{document.workflow_id}",
+                document_id=document.id
+            )
+        
+        self._remove_file(document.file_path)
+        db.delete(document)
+        db.commit()
+    
+    def _collection_names(self, components: List[WorkflowComponent], workflow_id: int) -> Set[str]:
+        names = {f"workflow_{workflow_id}"}
+        for component in components:
+            if component.component_type == "knowledge_base":
+                config = component.configuration or {}
+                if config.get("collection_name"):
+                    names.add(config["collection_name"])
+                names.update(config.get("collection_names") or [])
+        return names
+    
+    def purge_inactive_workflows(self, db: Session) -> Dict[str, int]:
+        """Hard-delete workflows soft-deleted longer ago than the grace period"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.workflow_purge_grace_days)
+        workflows = db.query(Workflow).filter(
+            Workflow.is_active == False,
+            Workflow.deleted_at != None,
+            Workflow.deleted_at < cutoff
+        ).all()
+        
+        stats = {"workflows": 0, "documents": 0, "messages": 0, "collections": 0}
+        if not workflows:
+            return stats
+        
+        # Collections still named by a live workflow's knowledge base are shared, keep them
+        live_components = db.query(WorkflowComponent).join(Workflow).filter(Workflow.is_active == True).all()
+        live_collections = set()
+        for component in live_components:
+            live_collections |= self._collection_names([component], component.workflow_id)
+        
+        for workflow in workflows:
+            for name in self._collection_names(workflow.components, workflow.id) - live_collections:
+                if self.embedding_service.delete_collection(name):
+                    stats["collections"] += 1
+            
+            documents = db.query(Document).filter(Document.workflow_id == workflow.id).all()
+            for document in documents:
+                self._remove_file(document.file_path)
+                db.delete(document)
+            stats["documents"] += len(documents)
+            
+            stats["messages"] += db.query(ChatMessage).filter(
+                ChatMessage.workflow_id == workflow.id
+            ).delete(synchronize_session=False)
+            
+            db.delete(workflow)
+            db.commit()
+            stats["workflows"] += 1
+        
+        return stats
+    
+    def compact_collections(self) -> List[str]:
+        """Compact collections whose deleted vectors exceed the configured ratio"""
+        compacted = []
+        for name, deleted in self.embedding_service.get_tombstones().items():
+            info = self.embedding_service.get_collection_info(name)
+            if not info:
+                self.embedding_service.reset_tombstones(name)
+                continue
+            
+            if deleted / max(info["count"] + deleted, 1) >= settings.vector_compaction_ratio:
+                if self.embedding_service.compact_collection(name):
+                    compacted.append(name)
+        return compacted
+    
+    def run(self, db: Session) -> Dict[str, Any]:
+        """Run one full garbage collection pass.
+        
+        Every worker process runs the reaper; a pass is skipped while another
+        process holds the lock.
+        """
+        os.makedirs(settings.chroma_persist_directory, exist_ok=True)
+        with open(os.path.join(settings.chroma_persist_directory, "gc.lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return {"workflows": 0, "documents": 0, "messages": 0, "collections": 0, "compacted": []}
+            stats = self.purge_inactive_workflows(db)
+            stats["compacted"] = self.compact_collections()
+            return stats
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import hashlib
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from sqlalchemy.orm import Session
+from app.models.document import Document
+from app.models.workflow import Workflow
+from app.core.config import settings
+from app.services.document_service import DocumentService, extract_pdf_pages_cached, hash_file
+
+
+class IngestService:
+    """Offline bulk ingestion of a directory of PDFs into a workflow's knowledge base.
+    
+    Writes document rows and the ``workflow_{id}`` collection directly, without
+    going through the API. Progress is kept in a JSON manifest keyed by content
+    hash so an interrupted run can be resumed and unchanged files are skipped.
+    """
+    
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 512):
+        self.workers = workers or settings.ingest_workers or os.cpu_count()
+        self.batch_size = batch_size  # Chunks embedded and written per flush
+        self.document_service = DocumentService()
+    
+    def find_pdfs(self, corpus_dir: str) -> List[str]:
+        """All PDF files under a directory, in a stable order"""
+        paths = []
+        for root, _, filenames in os.walk(corpus_dir):
+            for filename in filenames:
+                if filename.lower().endswith('.pdf'):
+                    paths.append(os.path.join(root, filename))
+        return sorted(paths)
+    
+    def load_manifest(self, manifest_path: str) -> Dict[str, Any]:
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                return json.load(f)
+        return {}
+    
+    def default_manifest_path(self, corpus_dir: str, workflow_id: int) -> str:
+        """Manifest under ``ingest_manifest_dir``, keyed by the corpus path, so corpora stay read-only"""
+        corpus_key = hashlib.sha256(os.path.abspath(corpus_dir).encode()).hexdigest()[:16]
+        return os.path.join(settings.ingest_manifest_dir, f"workflow_{workflow_id}_{corpus_key}.json")
+    
+    def save_manifest(self, manifest_path: str, manifest: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+        # Write then rename so a crash never leaves a truncated manifest
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, manifest_path)
+    
+    def _extract_window(
+        self,
+        pool: ProcessPoolExecutor,
+        files: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Extract files in the pool, keeping only a bounded number in flight"""
+        window = self.workers * 2
+        futures = []
+        for path, content_hash in files:
+            futures.append((path, content_hash, pool.submit(extract_pdf_pages_cached, path, content_hash)))
+            if len(futures) >= window:
+                path, content_hash, future = futures.pop(0)
+                yield path, content_hash, future.result()
+        for path, content_hash, future in futures:
+            yield path, content_hash, future.result()
+    
+    def _get_or_create_document(
+        self,
+        db: Session,
+        workflow_id: int,
+        path: str,
+        entry: Optional[Dict[str, Any]],
+        content_changed: bool = False
+    ) -> Document:
+        """Reuse the row of a file ingested before, otherwise copy the file and create one"""
+        if entry:
+            document = db.query(Document).filter(Document.id == entry["document_id"]).first()
+            if document:
+                if content_changed:
+                    with open(path, 'rb') as src, open(document.file_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    document.file_size = os.path.getsize(document.file_path)
+                return document
+        
+        with open(path, 'rb') as f:
+            file_path, file_size = self.document_service.save_file_stream(f, os.path.basename(path))
+        document = Document(
+            filename=os.path.basename(file_path),
+            original_filename=os.path.basename(path),
+            file_path=file_path,
+            file_size=file_size,
+            mime_type="application/pdf",
+            workflow_id=workflow_id,
+            embedding_status="processing"
+        )
+        db.add(document)
+        db.commit()
+        db.refresh(document)
+        return document
+    
+    def _flush(
+        self,
+        db: Session,
+        workflow_id: int,
+        pending: List[Dict[str, Any]],
+        manifest: Dict[str, Any],
+        manifest_path: str,
+        stats: Dict[str, Any]
+    ) -> bool:
+        """Sync the chunks of all buffered documents in one batch, embedding only new ones"""
+        documents, metadatas, ids = [], [], []
+        for item in pending:
+            documents.extend(item["chunks"])
+            metadatas.extend(item["metadatas"])
+            ids.extend(item["ids"])
+        
+        result = self.document_service.embedding_service.sync_document_chunks(
+            collection_name=f"workflow_{workflow_id}",
+            document_ids=[item["document"].id for item in pending],
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids,
+            collection_config=self.document_service.get_knowledge_base_config(db, workflow_id)
+        )
+        success = result is not None
+        if success:
+            for key in ("added", "removed", "unchanged"):
+                stats[f"chunks_{key}"] += result[key]
+        
+        status = "completed" if success else "failed"
+        for item in pending:
+            item["document"].embedding_status = status
+            manifest[item["hash"]]["status"] = status
+        db.commit()
+        self.save_manifest(manifest_path, manifest)
+        return success
+    
+    def ingest_directory(
+        self,
+        db: Session,
+        workflow_id: int,
+        corpus_dir: str,
+        manifest_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Ingest every PDF under ``corpus_dir`` into a workflow's knowledge base"""
+        if not db.query(Workflow).filter(Workflow.id == workflow_id).first():
+            raise ValueError(f"Workflow {workflow_id} not found")
+        
+        manifest_path = manifest_path or self.default_manifest_path(corpus_dir, workflow_id)
+        manifest = self.load_manifest(manifest_path)
+        paths = self.find_pdfs(corpus_dir)
+        
+        stats = {
+            "files": len(paths), "skipped": 0, "ingested": 0, "failed": 0, "pages": 0, "chunks": 0,
+            "chunks_added": 0, "chunks_removed": 0, "chunks_unchanged": 0
+        }
+        # Files ingested with other chunking settings are re-chunked; unchanged chunks are kept
+        chunking = f"{settings.chunk_size}:{settings.chunk_overlap}"
+        start_time = time.perf_counter()
+        
+        def report(final: bool = False):
+            elapsed = max(time.perf_counter() - start_time, 1e-9)
+            done = stats["skipped"] + stats["ingested"] + stats["failed"]
+            print(
+                f"{'Finished' if final else 'Progress'}: {done}/{stats['files']} files, "
+                f"{stats['pages']} pages ({stats['pages'] / elapsed:.1f} pages/s), "
+                f"{stats['chunks']} chunks ({stats['chunks'] / elapsed:.1f} chunks/s, "
+                f"{stats['chunks_added']} embedded, {stats['chunks_unchanged']} unchanged)"
+            )
+        
+        hashes_by_path = {entry["path"]: content_hash for content_hash, entry in manifest.items()}
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            hashes = list(pool.map(hash_file, paths, chunksize=16))
+            
+            # Skip content already ingested, and duplicates within the corpus
+            todo, seen = [], set()
+            for path, content_hash in zip(paths, hashes):
+                entry = manifest.get(content_hash)
+                up_to_date = entry and entry["status"] == "completed" and entry.get("chunking") == chunking
+                if up_to_date or content_hash in seen:
+                    stats["skipped"] += 1
+                    continue
+                seen.add(content_hash)
+                todo.append((path, content_hash))
+            
+            pending, pending_chunks = [], 0
+            for path, content_hash, extraction in self._extract_window(pool, todo):
+                if not extraction["success"]:
+                    print(f"Failed to extract {path}: {extraction.get('error')}")
+                    stats["failed"] += 1
+                    continue
+                
+                # An edited file keeps its document, so only its changed chunks are re-embedded
+                previous_hash = content_hash if content_hash in manifest else hashes_by_path.get(path)
+                entry = manifest.pop(previous_hash, None) if previous_hash else None
+                document = self._get_or_create_document(
+                    db, workflow_id, path, entry, content_changed=previous_hash != content_hash
+                )
+                document.text_content = extraction["text_content"]
+                document.page_count = extraction["page_count"]
+                manifest[content_hash] = {
+                    "document_id": document.id,
+                    "path": path,
+                    "status": "processing",
+                    "chunking": chunking
+                }
+                
+                chunks, metadatas, ids = self.document_service.build_chunks(document, extraction["pages"])
+                item = {"hash": content_hash, "document": document, "chunks": chunks, "metadatas": metadatas, "ids": ids}
+                
+                pending.append(item)
+                pending_chunks += len(item["chunks"])
+                stats["pages"] += extraction["page_count"]
+                stats["chunks"] += len(item["chunks"])
+                
+                if pending_chunks >= self.batch_size:
+                    if self._flush(db, workflow_id, pending, manifest, manifest_path, stats):
+                        stats["ingested"] += len(pending)
+                    else:
+                        stats["failed"] += len(pending)
+                    pending, pending_chunks = [], 0
+                    report()
+            
+            if pending:
+                if self._flush(db, workflow_id, pending, manifest, manifest_path, stats):
+                    stats["ingested"] += len(pending)
+                else:
+                    stats["failed"] += len(pending)
+        
+        report(final=True)
+        stats["elapsed"] = time.perf_counter() - start_time
+        return stats
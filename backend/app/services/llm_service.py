@@ -1,45 +1,60 @@
-import openai
-import google.generativeai as genai
 from typing import Dict, Any, Optional, List
 from app.core.config import settings
-from serpapi import GoogleSearch
+from app.core.metrics import track_provider_call, record_tokens
+from app.core.tracing import traced
+from app.services.providers import provider_registry
 import json
 
 
 class LLMService:
+    # Provider SDKs are imported when a client is first needed, not at startup
     def __init__(self):
-        # Initialize OpenAI client
-        if settings.openai_api_key:
-            self.openai_client = openai.OpenAI(api_key=settings.openai_api_key)
-        else:
-            self.openai_client = None
-        
-        # Initialize Google Gemini client
-        if settings.google_api_key:
+        self._gemini_model = None
+    
+    @property
+    def openai_client(self):
+        """OpenAI client, None without an API key"""
+        return provider_registry.client("openai")
+    
+    @property
+    def gemini_model(self):
+        """Gemini model, None without an API key"""
+        if self._gemini_model is None and settings.google_api_key:
+            import google.generativeai as genai
+            
             genai.configure(api_key=settings.google_api_key)
-            self.gemini_model = genai.GenerativeModel(settings.google_model)
-        else:
-            self.gemini_model = None
+            self._gemini_model = genai.GenerativeModel(settings.google_model)
+        return self._gemini_model
     
     def generate_openai_response(
         self, 
         prompt: str, 
         model: str = None, 
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        provider: str = "openai",
+        api_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Generate response using OpenAI GPT"""
-        if not self.openai_client:
-            return {"error": "OpenAI API key not configured"}
+        """Generate response using OpenAI GPT or another OpenAI-compatible provider.
+        
+        ``api_key`` replaces the provider's configured key, e.g. a workflow's own.
+        """
+        client = provider_registry.client(provider, api_key)
+        if not client:
+            if provider == "openai":
+                return {"error": "OpenAI API key not configured"}
+            return {"error": f"Provider {provider} not configured"}
         
         try:
-            model = model or settings.openai_model
-            response = self.openai_client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            model = model or provider_registry.config(provider)["chat_model"]
+            with track_provider_call(provider, "chat"):
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            record_tokens(model, response.usage.prompt_tokens, response.usage.completion_tokens)
             
             return {
                 "response": response.choices[0].message.content,
@@ -63,12 +78,17 @@ class LLMService:
             return {"error": "Google API key not configured"}
         
         try:
-            response = self.gemini_model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature
+            import google.generativeai as genai
+            
+            with track_provider_call("gemini", "chat"):
+                response = self.gemini_model.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=temperature
+                    )
                 )
-            )
+            # Word counts, Gemini usage is not read from the response
+            record_tokens(settings.google_model, len(prompt.split()), len(response.text.split()))
             
             return {
                 "response": response.text,
@@ -82,18 +102,22 @@ class LLMService:
         except Exception as e:
             return {"error": f"Gemini API error: {str(e)}"}
     
+    @traced("llm.web_search")
     def web_search(self, query: str, num_results: int = 5) -> List[Dict[str, Any]]:
         """Perform web search using SerpAPI"""
         if not settings.serpapi_key:
             return []
         
         try:
+            from serpapi import GoogleSearch
+            
             search = GoogleSearch({
                 "q": query,
                 "api_key": settings.serpapi_key,
                 "num": num_results
             })
-            results = search.get_dict()
+            with track_provider_call("serpapi", "search"):
+                results = search.get_dict()
             
             search_results = []
             if "organic_results" in results:
@@ -110,6 +134,7 @@ class LLMService:
             print(f"Web search error: {e}")
             return []
     
+    @traced("llm.generate")
     def generate_response_with_context(
         self,
         query: str,
@@ -117,9 +142,17 @@ class LLMService:
         model: str = "openai",
         temperature: float = 0.7,
         use_web_search: bool = False,
-        custom_prompt: str = ""
+        custom_prompt: str = "",
+        chat_model: Optional[str] = None,
+        api_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Generate response with optional context and web search"""
+        """Generate response with optional context and web search.
+        
+        ``model`` is "gemini" or a registered OpenAI-compatible provider;
+        anything else uses OpenAI. ``chat_model`` overrides the provider's
+        default chat model and ``api_key`` its key (Gemini always uses the
+        configured key).
+        """
         
         # Build the prompt
         if custom_prompt:
@@ -142,10 +175,13 @@ class LLMService:
                 prompt = prompt.replace("Question:", f"{web_context}\nQuestion:")
         
         # Generate response based on model choice
+        provider = model.lower() if model.lower() in provider_registry.names() else "openai"
         if model.lower() == "gemini" and self.gemini_model:
             return self.generate_gemini_response(prompt, temperature)
-        elif self.openai_client:
-            return self.generate_openai_response(prompt, temperature=temperature)
+        elif provider_registry.client(provider, api_key):
+            return self.generate_openai_response(
+                prompt, model=chat_model, temperature=temperature, provider=provider, api_key=api_key
+            )
         else:
             return {"error": "No LLM configured"}
     
@@ -166,4 +202,8 @@ class LLMService:
         if self.gemini_model:
             models["gemini"] = [settings.google_model]
         
+        for name in provider_registry.names():
+            if name != "openai":
+                models[name] = provider_registry.models(name)
+        
         return models 
\ No newline at end of file
@@ -0,0 +1,583 @@
+import os
+import json
+import uuid
+import fcntl
+import shutil
+import sqlite3
+import threading
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Rows scored per matrix-vector product; bounds the float32 copy made for float16 stores
+QUERY_BLOCK_ROWS = 131072
+
+_open_collections: Dict[str, "NumpyCollection"] = {}
+_open_collections_lock = threading.Lock()
+
+
+def _where_to_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Translate a Chroma-style metadata filter into SQL over the JSON metadata column"""
+    clauses, params = [], []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [_where_to_sql(sub) for sub in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            for _, sub_params in parts:
+                params.extend(sub_params)
+            continue
+        
+        field = "json_extract(metadata, ?)"
+        path = f'$."{key}"'
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, value in condition.items():
+            if op in ("$in", "$nin"):
+                placeholders = ", ".join("?" for _ in value) or "NULL"
+                negate = "NOT " if op == "$nin" else ""
+                clauses.append(f"{field} {negate}IN ({placeholders})")
+                params.append(path)
+                params.extend(value)
+            else:
+                sql_op = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}[op]
+                clauses.append(f"{field} {sql_op} ?")
+                params.extend([path, value])
+    
+    return " AND ".join(clauses) or "1", params
+
+
+def _where_document_to_sql(where_document: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Translate a Chroma-style document filter ($contains/$not_contains) into SQL"""
+    clauses, params = [], []
+    for op, value in where_document.items():
+        if op in ("$and", "$or"):
+            parts = [_where_document_to_sql(sub) for sub in value]
+            joiner = " AND " if op == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            for _, sub_params in parts:
+                params.extend(sub_params)
+        else:
+            # instr is case-sensitive, like Chroma's substring match
+            clauses.append("instr(document, ?) > 0" if op == "$contains" else "instr(document, ?) = 0")
+            params.append(value)
+    return " AND ".join(clauses) or "1", params
+
+
+class NumpyCollection:
+    """A collection stored as a memory-mapped vector matrix plus a SQLite sidecar.
+    
+    Vectors are L2-normalised on insert and kept in a contiguous float16 or
+    float32 file, so worker processes share them through the OS page cache.
+    Ids, documents and metadata live in ``rows.sqlite``. Search is exact: one
+    matrix-vector product per block of rows followed by ``argpartition``.
+    Deleted rows are masked until the collection is compacted. Compaction
+    publishes its new files and row numbers while holding ``swap.lock``
+    exclusively, and reads hold it shared, so no process searches the new
+    files with the old row numbers or the reverse.
+    
+    With dtype ``int8`` the mapped matrix holds scalar-quantized vectors
+    (per-dimension scales calibrated on the first batch) and full-precision
+    copies are kept in ``full.bin``. Search takes a coarse top ``k *
+    rerank_factor`` over the quantized matrix, then re-ranks that shortlist
+    exactly against the full vectors read from disk.
+    
+    Implements the subset of the ChromaDB collection API used by
+    ``EmbeddingService``, with cosine distances.
+    """
+    
+    def __init__(self, path: str, name: str):
+        self.path = path
+        self.name = name
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(path, "rows.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT)"
+        )
+        self._db.commit()
+        self._swap_file = open(self._file("swap.lock"), "w")
+        self._header_stamp = None
+        self._header: Dict[str, Any] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._deleted: Optional[np.memmap] = None
+        self._full: Optional[np.memmap] = None
+        self._scales: Optional[np.ndarray] = None
+    
+    # Files and header
+    
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            return self._header.get("metadata") or {}
+    
+    def _write_header(self) -> None:
+        tmp_path = self._file(f"header.json.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._header, f)
+        os.replace(tmp_path, self._file("header.json"))
+        self._header_stamp = self._stamp()
+    
+    def _stamp(self) -> Tuple[int, int]:
+        # The header is always replaced, so a new inode marks a change even
+        # when the coarse mtime has not moved
+        stat = os.stat(self._file("header.json"))
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _refresh(self) -> None:
+        """Remap the files if another process changed the collection"""
+        stamp = self._stamp()
+        if stamp == self._header_stamp:
+            return
+        with open(self._file("header.json")) as f:
+            self._header = json.load(f)
+        self._header_stamp = stamp
+        self._map()
+    
+    @property
+    def quantized(self) -> bool:
+        return self._header.get("dtype") == "int8"
+    
+    def _layout(self) -> List[Tuple[str, str, int]]:
+        """(file, dtype, values per row) of each row-aligned file"""
+        dim = self._header["dim"]
+        layout = [("vectors.bin", self._header["dtype"], dim), ("deleted.bin", "uint8", 1)]
+        if self.quantized:
+            layout.append(("full.bin", "float32", dim))
+        return layout
+    
+    def _map(self) -> None:
+        capacity, dim = self._header["capacity"], self._header["dim"]
+        self._scales = np.asarray(self._header["scales"], dtype=np.float32) if self._header.get("scales") else None
+        if not capacity or not dim:
+            self._vectors, self._deleted, self._full = None, None, None
+            return
+        self._vectors = np.memmap(
+            self._file("vectors.bin"), dtype=self._header["dtype"], mode="r+", shape=(capacity, dim)
+        )
+        self._deleted = np.memmap(self._file("deleted.bin"), dtype=np.uint8, mode="r+", shape=(capacity,))
+        if self.quantized:
+            self._full = np.memmap(self._file("full.bin"), dtype=np.float32, mode="r+", shape=(capacity, dim))
+    
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._header["capacity"]:
+            return
+        capacity = max(rows, self._header["capacity"] * 2, 1024)
+        for name, dtype, width in self._layout():
+            with open(self._file(name), "ab") as f:
+                f.truncate(capacity * width * np.dtype(dtype).itemsize)
+        self._header["capacity"] = capacity
+        self._map()
+    
+    def _quantize(self, matrix: np.ndarray) -> np.ndarray:
+        if self._scales is None:
+            # Calibrate per-dimension scales on the first batch; later outliers are clipped
+            scales = np.abs(matrix).max(axis=0) / 127
+            scales[scales == 0] = 1 / 127
+            self._header["scales"] = scales.tolist()
+            self._scales = scales.astype(np.float32)
+        return np.clip(np.rint(matrix / self._scales), -127, 127).astype(np.int8)
+    
+    def _full_vectors(self, rows) -> np.ndarray:
+        """Full-precision vectors of the given rows"""
+        source = self._full if self.quantized else self._vectors
+        return np.asarray(source[rows], dtype=np.float32)
+    
+    class _WriteLock:
+        """Serialises writers across threads and processes"""
+        
+        def __init__(self, collection: "NumpyCollection"):
+            self.collection = collection
+        
+        def __enter__(self):
+            self.collection._lock.acquire()
+            self.file = open(self.collection._file("lock"), "w")
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+            self.collection._refresh()
+        
+        def __exit__(self, *exc):
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.collection._lock.release()
+    
+    class _ReadLock:
+        """Keeps a compaction in another process from being published mid-read"""
+        
+        def __init__(self, collection: "NumpyCollection"):
+            self.collection = collection
+        
+        def __enter__(self):
+            # The thread lock also keeps threads from unlocking each other's shared lock
+            self.collection._lock.acquire()
+            fcntl.flock(self.collection._swap_file, fcntl.LOCK_SH)
+            self.collection._refresh()
+        
+        def __exit__(self, *exc):
+            fcntl.flock(self.collection._swap_file, fcntl.LOCK_UN)
+            self.collection._lock.release()
+    
+    # Chroma-compatible API
+    
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._header["rows"] - self._header["deleted"]
+    
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Append vectors; ids that already exist are ignored, as in Chroma"""
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        
+        with self._WriteLock(self):
+            existing = {
+                row[0] for row in self._select("SELECT id FROM rows WHERE id IN ({})", ids)
+            }
+            keep = [i for i, item_id in enumerate(ids) if item_id not in existing]
+            if not keep:
+                return
+            
+            matrix = np.asarray([embeddings[i] for i in keep], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1, norms)
+            
+            if not self._header["dim"]:
+                self._header["dim"] = matrix.shape[1]
+            elif matrix.shape[1] != self._header["dim"]:
+                raise ValueError(
+                    f"Embedding dimension {matrix.shape[1]} does not match collection dimension {self._header['dim']}"
+                )
+            
+            start = self._header["rows"]
+            end = start + len(keep)
+            self._ensure_capacity(end)
+            if self.quantized:
+                self._vectors[start:end] = self._quantize(matrix)
+                self._full[start:end] = matrix
+                self._full.flush()
+            else:
+                self._vectors[start:end] = matrix.astype(self._header["dtype"])
+            self._deleted[start:end] = 0
+            self._vectors.flush()
+            self._deleted.flush()
+            
+            self._db.executemany(
+                "INSERT INTO rows (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (start + n, ids[i], documents[i], json.dumps(metadatas[i] or {}))
+                    for n, i in enumerate(keep)
+                ]
+            )
+            self._db.commit()
+            
+            self._header["rows"] = end
+            self._write_header()
+    
+    def upsert(self, ids, embeddings, documents=None, metadatas=None) -> None:
+        self.delete(ids=ids)
+        self.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+    
+    def _select(self, sql: str, values: List[Any], params: Tuple = ()) -> List[tuple]:
+        """Run an ``IN ({})`` query in batches below SQLite's variable limit"""
+        results = []
+        for start in range(0, len(values), 500):
+            batch = list(values[start:start + 500])
+            results.extend(self._db.execute(sql.format(", ".join("?" for _ in batch)), (*params, *batch)))
+        return results
+    
+    def _rows_for(
+        self,
+        ids: Optional[List[str]],
+        where: Optional[Dict[str, Any]],
+        where_document: Optional[Dict[str, Any]] = None
+    ) -> List[tuple]:
+        sql = "SELECT row, id, document, metadata FROM rows"
+        clauses, params = [], []
+        for condition, translate in ((where, _where_to_sql), (where_document, _where_document_to_sql)):
+            if condition:
+                condition_sql, condition_params = translate(condition)
+                clauses.append(condition_sql)
+                params.extend(condition_params)
+        if ids is not None:
+            clauses.append("id IN ({})")
+            sql += " WHERE " + " AND ".join(clauses) + " ORDER BY row"
+            return self._select(sql, ids, tuple(params))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self._db.execute(sql + " ORDER BY row", params).fetchall()
+    
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        include = ["documents", "metadatas"] if include is None else include
+        with self._ReadLock(self):
+            rows = self._rows_for(ids, where, where_document)
+            rows = rows[offset or 0:(offset or 0) + limit if limit is not None else None]
+            return {
+                "ids": [row[1] for row in rows],
+                "documents": [row[2] for row in rows] if "documents" in include else None,
+                "metadatas": [json.loads(row[3]) for row in rows] if "metadatas" in include else None,
+                "embeddings": (
+                    self._full_vectors([row[0] for row in rows]).tolist()
+                    if "embeddings" in include and rows else ([] if "embeddings" in include else None)
+                )
+            }
+    
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        where_document: Optional[Dict[str, Any]] = None
+    ) -> None:
+        with self._WriteLock(self):
+            rows = [row[0] for row in self._rows_for(ids, where, where_document)]
+            if not rows:
+                return
+            self._deleted[rows] = 1
+            self._deleted.flush()
+            self._select("DELETE FROM rows WHERE row IN ({})", rows)
+            self._db.commit()
+            self._header["deleted"] += len(rows)
+            self._write_header()
+    
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries /= np.where(norms == 0, 1, norms)
+        
+        with self._ReadLock(self):
+            rows = self._header["rows"]
+            if not rows or self._vectors is None:
+                empty = [[] for _ in range(len(queries))]
+                return {"ids": empty, "documents": empty, "metadatas": empty, "distances": empty}
+            
+            candidates = None
+            if where or where_document:
+                candidates = np.asarray(
+                    [row[0] for row in self._rows_for(None, where, where_document)], dtype=np.int64
+                )
+            
+            k = min(n_results, rows)
+            if self.quantized:
+                shortlist_rows, _ = self._top_k(queries * self._scales, k * self._header["rerank_factor"], rows, candidates)
+                top_rows, top_scores = self._rerank(queries, shortlist_rows, k)
+            else:
+                top_rows, top_scores = self._top_k(queries, k, rows, candidates)
+            
+            needed = sorted({int(r) for r in top_rows.ravel() if r >= 0})
+            info = {
+                row[0]: row for row in
+                self._select("SELECT row, id, document, metadata FROM rows WHERE row IN ({})", needed)
+            }
+        
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for q in range(len(queries)):
+            hits = [(int(r), float(s)) for r, s in zip(top_rows[q], top_scores[q]) if r >= 0 and int(r) in info]
+            result["ids"].append([info[r][1] for r, _ in hits])
+            result["documents"].append([info[r][2] for r, _ in hits])
+            result["metadatas"].append([json.loads(info[r][3]) for r, _ in hits])
+            result["distances"].append([1.0 - s for _, s in hits])
+        
+        for key in ("documents", "metadatas", "distances"):
+            if key not in include:
+                result[key] = None
+        return result
+    
+    def _top_k(
+        self,
+        queries: np.ndarray,
+        k: int,
+        rows: int,
+        candidates: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k rows by cosine similarity for each query (-1 pads missing hits)"""
+        best_rows = np.full((len(queries), 0), -1, dtype=np.int64)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        
+        if candidates is not None:
+            blocks = [candidates[i:i + QUERY_BLOCK_ROWS] for i in range(0, len(candidates), QUERY_BLOCK_ROWS)]
+        else:
+            blocks = [np.arange(i, min(i + QUERY_BLOCK_ROWS, rows)) for i in range(0, rows, QUERY_BLOCK_ROWS)]
+        
+        for block in blocks:
+            if candidates is None:
+                matrix = self._vectors[block[0]:block[-1] + 1]
+                deleted = self._deleted[block[0]:block[-1] + 1]
+            else:
+                matrix = self._vectors[block]
+                deleted = self._deleted[block]
+            if matrix.dtype != np.float32:
+                matrix = matrix.astype(np.float32)
+            
+            scores = queries @ matrix.T
+            scores[:, deleted.astype(bool)] = -np.inf
+            
+            block_k = min(k, scores.shape[1])
+            part = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            best_rows = np.concatenate([best_rows, block[part]], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+            
+            if best_rows.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        
+        order = np.argsort(-best_scores, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows[~np.isfinite(best_scores)] = -1
+        return best_rows, best_scores
+    
+    def _rerank(self, queries: np.ndarray, shortlist: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k of each query's shortlist using the full-precision vectors"""
+        top_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        top_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, rows in enumerate(shortlist):
+            rows = rows[rows >= 0]
+            if not len(rows):
+                continue
+            # Sorted reads keep disk access sequential
+            rows = np.sort(rows)
+            scores = self._full_vectors(rows) @ queries[q]
+            order = np.argsort(-scores)[:k]
+            top_rows[q, :len(order)] = rows[order]
+            top_scores[q, :len(order)] = scores[order]
+        return top_rows, top_scores
+    
+    def compact(self) -> None:
+        """Rewrite the files without deleted rows"""
+        with self._WriteLock(self):
+            if not self._header["deleted"]:
+                return
+            live = np.flatnonzero(self._deleted[:self._header["rows"]] == 0)
+            
+            replacements = []
+            for name, source in (("vectors.bin", self._vectors), ("full.bin", self._full)):
+                if source is None:
+                    continue
+                tmp_path = self._file(f"{name}.{uuid.uuid4().hex}.tmp")
+                compacted = np.memmap(tmp_path, dtype=source.dtype, mode="w+",
+                                      shape=(max(len(live), 1), self._header["dim"]))
+                for start in range(0, len(live), QUERY_BLOCK_ROWS):
+                    block = live[start:start + QUERY_BLOCK_ROWS]
+                    compacted[start:start + len(block)] = source[block]
+                compacted.flush()
+                del compacted
+                replacements.append((tmp_path, self._file(name)))
+            
+            deleted_path = self._file(f"deleted.bin.{uuid.uuid4().hex}.tmp")
+            with open(deleted_path, "wb") as f:
+                f.truncate(max(len(live), 1))
+            replacements.append((deleted_path, self._file("deleted.bin")))
+            
+            # Files are replaced rather than rewritten, so other processes' maps
+            # of the old ones stay valid until they remap
+            fcntl.flock(self._swap_file, fcntl.LOCK_EX)
+            try:
+                for tmp_path, path in replacements:
+                    os.replace(tmp_path, path)
+                
+                # Renumber rows to match their new positions
+                self._db.execute("CREATE TEMP TABLE row_map (old INTEGER PRIMARY KEY, new INTEGER)")
+                self._db.executemany("INSERT INTO row_map VALUES (?, ?)", ((int(old), new) for new, old in enumerate(live)))
+                self._db.execute("UPDATE rows SET row = -1 - (SELECT new FROM row_map WHERE old = rows.row)")
+                self._db.execute("UPDATE rows SET row = -1 - row")
+                self._db.execute("DROP TABLE row_map")
+                self._db.commit()
+                
+                self._header.update({"rows": len(live), "deleted": 0, "capacity": max(len(live), 1)})
+                self._map()
+                self._write_header()
+            finally:
+                fcntl.flock(self._swap_file, fcntl.LOCK_UN)
+
+
+class NumpyVectorStore:
+    """Client for memory-mapped NumPy collections, mirroring the ChromaDB client API"""
+    
+    def __init__(self, path: str, dtype: str = "float32", rerank_factor: int = 4):
+        self.path = path
+        self.dtype = dtype
+        self.rerank_factor = rerank_factor
+        os.makedirs(self.path, exist_ok=True)
+    
+    def _collection_path(self, name: str) -> str:
+        return os.path.join(self.path, name)
+    
+    def has_collection(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self._collection_path(name), "header.json"))
+    
+    def list_collections(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.path) if self.has_collection(name))
+    
+    def get_collection(self, name: str) -> NumpyCollection:
+        if not self.has_collection(name):
+            raise ValueError(f"Collection {name} does not exist.")
+        path = self._collection_path(name)
+        with _open_collections_lock:
+            # One open collection per process so its memory maps are reused across requests
+            if path not in _open_collections:
+                _open_collections[path] = NumpyCollection(path, name)
+            return _open_collections[path]
+    
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        """Create a collection; ``numpy:dtype`` in metadata overrides the store's dtype"""
+        if self.has_collection(name):
+            raise ValueError(f"Collection {name} already exists.")
+        path = self._collection_path(name)
+        os.makedirs(path, exist_ok=True)
+        for filename in ("vectors.bin", "deleted.bin", "full.bin"):
+            open(os.path.join(path, filename), "wb").close()
+        header = {
+            "dim": 0,
+            "dtype": (metadata or {}).get("numpy:dtype", self.dtype),
+            "rerank_factor": self.rerank_factor,
+            "rows": 0,
+            "deleted": 0,
+            "capacity": 0,
+            "metadata": metadata or {}
+        }
+        tmp_path = os.path.join(path, "header.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, os.path.join(path, "header.json"))
+        return self.get_collection(name)
+    
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        if self.has_collection(name):
+            return self.get_collection(name)
+        return self.create_collection(name, metadata)
+    
+    def delete_collection(self, name: str) -> None:
+        if not self.has_collection(name):
+            raise ValueError(f"Collection {name} does not exist.")
+        path = self._collection_path(name)
+        with _open_collections_lock:
+            collection = _open_collections.pop(path, None)
+        if collection:
+            collection._db.close()
+            collection._swap_file.close()
+        shutil.rmtree(path)
@@ -0,0 +1,189 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+from app.core.config import settings
+
+# openai and httpx are imported when a provider's client is first needed
+if TYPE_CHECKING:
+    import openai
+
+
+def key_hash(api_key: str) -> str:
+    """Identifies an API key in pool keys and stats without holding the key itself"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class ProviderRegistry:
+    """OpenAI-compatible chat and embedding endpoints by name, and a pool of their clients.
+    
+    "openai" is always registered from the OpenAI settings (``openai_base_url``
+    points it at another endpoint). ``settings.llm_providers`` adds others,
+    such as a vLLM or llama.cpp server next to the backend.
+    
+    Clients are pooled per (provider, base URL, API key hash), so a workflow
+    with its own key reuses one client, with its own keep-alive connections
+    and request and rate-limit counts, instead of building one per request.
+    Beyond ``provider_client_pool_size`` the least recently used client is
+    evicted, and clients unused for ``provider_client_idle_seconds`` are closed.
+    """
+    
+    def __init__(self):
+        self._clients: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def names(self) -> List[str]:
+        return list(dict.fromkeys(["openai", *settings.llm_providers]))
+    
+    def config(self, name: str) -> Optional[Dict[str, Any]]:
+        """Settings of a provider with defaults filled in, None if it is not registered"""
+        name = name.lower()
+        defaults = {
+            "timeout": settings.provider_timeout_seconds,
+            "max_connections": settings.provider_max_connections,
+            "models": []
+        }
+        if name == "openai":
+            defaults.update({
+                "base_url": settings.openai_base_url,
+                "api_key": settings.openai_api_key,
+                "chat_model": settings.openai_model,
+                "embedding_model": settings.openai_embedding_model
+            })
+        elif name in settings.llm_providers:
+            # Local servers usually ignore the key, but the client requires one
+            defaults["api_key"] = "EMPTY"
+        else:
+            return None
+        config = {**defaults, **settings.llm_providers.get(name, {})}
+        if not config.get("chat_model") and config["models"]:
+            config["chat_model"] = config["models"][0]
+        return config
+    
+    def _create(self, name: str, config: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+        import httpx
+        import openai
+        
+        entry = {
+            "provider": name,
+            "base_url": config.get("base_url") or "",
+            "key": key_hash(api_key),
+            "timeout": config["timeout"],
+            "last_used": time.monotonic(),
+            "requests": 0,
+            "rate_limited": 0
+        }
+        
+        # Counted per HTTP response, so SDK retries after a 429 are included
+        def count_response(response):
+            entry["requests"] += 1
+            if response.status_code == 429:
+                entry["rate_limited"] += 1
+        
+        entry["client"] = openai.OpenAI(
+            api_key=api_key,
+            base_url=config.get("base_url"),
+            timeout=config["timeout"],
+            http_client=httpx.Client(
+                timeout=config["timeout"],
+                limits=httpx.Limits(
+                    max_connections=config["max_connections"],
+                    max_keepalive_connections=config["max_connections"]
+                ),
+                event_hooks={"response": [count_response]}
+            )
+        )
+        return entry
+    
+    def _evict(self, now: float) -> List[Dict[str, Any]]:
+        # Entries are kept least recently used first; call with the lock held
+        evicted = []
+        while self._clients:
+            key, entry = next(iter(self._clients.items()))
+            if (len(self._clients) <= settings.provider_client_pool_size
+                    and now - entry["last_used"] < settings.provider_client_idle_seconds):
+                break
+            del self._clients[key]
+            evicted.append(entry)
+        return evicted
+    
+    def _close(self, entries: List[Dict[str, Any]], now: float) -> None:
+        for entry in entries:
+            # A client used within its timeout may still be serving a request;
+            # it is left to the garbage collector instead
+            if now - entry["last_used"] > entry["timeout"]:
+                entry["client"].close()
+    
+    def client(self, name: str, api_key: Optional[str] = None) -> Optional["openai.OpenAI"]:
+        """Pooled client of a provider for ``api_key``, by default the provider's own key.
+        
+        None if the provider is not registered or no key is configured.
+        """
+        config = self.config(name)
+        if not config:
+            return None
+        api_key = api_key or config.get("api_key")
+        if not api_key:
+            return None
+        
+        key = (name.lower(), config.get("base_url") or "", key_hash(api_key))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry:
+                entry["last_used"] = now
+                self._clients.move_to_end(key)
+            evicted = self._evict(now)
+        if not entry:
+            created = self._create(name.lower(), config, api_key)
+            with self._lock:
+                entry = self._clients.setdefault(key, created)
+                evicted += self._evict(now)
+            if entry is not created:
+                evicted.append(created)
+        self._close(evicted, now)
+        return entry["client"]
+    
+    def models(self, name: str) -> List[str]:
+        """Configured models of a provider, or those its endpoint lists"""
+        config = self.config(name)
+        if not config:
+            return []
+        if config["models"]:
+            return list(config["models"])
+        client = self.client(name)
+        if not client:
+            return []
+        try:
+            return [model.id for model in client.models.list().data]
+        except Exception as e:
+            print(f"Error listing models of {name}: {e}")
+            return [config["chat_model"]] if config.get("chat_model") else []
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Pooled clients, most recently used first, with their request and rate-limit counts"""
+        now = time.monotonic()
+        with self._lock:
+            entries = list(reversed(self._clients.values()))
+        return [
+            {
+                "provider": entry["provider"],
+                "base_url": entry["base_url"],
+                "key": entry["key"],
+                "requests": entry["requests"],
+                "rate_limited": entry["rate_limited"],
+                "idle_seconds": round(now - entry["last_used"], 1)
+            }
+            for entry in entries
+        ]
+    
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        for entry in entries:
+            entry["client"].close()
+
+
+provider_registry = ProviderRegistry()
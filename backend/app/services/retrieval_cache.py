@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import fcntl
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+
+
+class CollectionVersions:
+    """Monotonic per-collection version numbers, shared by every process.
+    
+    Versions live in a small JSON file next to the Chroma data. Writers bump a
+    collection's version under an exclusive file lock; readers keep the parsed
+    file in memory and reload it only when it changes, so looking up a version
+    costs one ``stat``. The file is always replaced, so its inode changes with
+    every bump even when the coarse mtime does not.
+    """
+    
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, "collection_versions.json")
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+    
+    def _read(self) -> Dict[str, int]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def get(self, collection_name: str) -> int:
+        stamp = self._file_stamp()
+        with self._lock:
+            if stamp != self._stamp:
+                self._versions = self._read() if stamp is not None else {}
+                self._stamp = stamp
+            return self._versions.get(collection_name, 0)
+    
+    def bump(self, collection_name: str) -> int:
+        """Advance a collection's version, invalidating results cached for it"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            versions = self._read()
+            versions[collection_name] = versions.get(collection_name, 0) + 1
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(versions, f)
+            os.replace(tmp_path, self.path)
+            self._versions = versions
+            self._stamp = self._file_stamp()
+            return versions[collection_name]
+
+
+class RetrievalCache:
+    """In-process LRU cache of search results with hit-rate accounting.
+    
+    Keys include the collection's version, so a write to the collection makes
+    its earlier entries unreachable; they age out of the LRU. Each entry
+    remembers how long computing it took, which is added to ``saved_ms`` on
+    every hit.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: int = 0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    @staticmethod
+    def make_key(collection_name: str, version: int, query: str, n_results: int, *filters: Any) -> Tuple:
+        normalized = " ".join(query.split()).casefold()
+        return (collection_name, version, normalized, n_results, *(json.dumps(f, sort_keys=True) for f in filters))
+    
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl_seconds and time.monotonic() - entry[0] > self.ttl_seconds):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_ms += entry[1]
+            # Copies, so callers can annotate results without touching the cache
+            return [dict(result) for result in entry[2]]
+    
+    def set(self, key: Tuple, results: List[Dict[str, Any]], cost_ms: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), cost_ms, [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_ms": round(self.saved_ms, 1)
+            }
+
+
+# Shared by every EmbeddingService in the process
+collection_versions = CollectionVersions(settings.chroma_persist_directory)
+retrieval_cache = RetrievalCache(settings.retrieval_cache_size, settings.retrieval_cache_ttl_seconds)
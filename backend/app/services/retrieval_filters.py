@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import select, Select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.document import Document, DocumentTag
+
+
+# Attributes that live on the document row and can change after its chunks are
+# indexed. They are resolved against the documents table into a document_id
+# predicate instead of being copied into chunk metadata, where they would go stale.
+DOCUMENT_FILTER_KEYS = ("tags", "uploaded_after", "uploaded_before", "embedding_status")
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def _explicit_document_ids(filters: Dict[str, Any]) -> Optional[List[int]]:
+    document_ids = _as_list(filters.get("document_ids"))
+    return [int(i) for i in document_ids] if document_ids else None
+
+
+def _document_ids_select(filters: Dict[str, Any], workflow_id: Optional[int] = None) -> Optional[Select]:
+    """SELECT of the ids of documents matching the document-level filters, None without any"""
+    if not any(filters.get(key) for key in DOCUMENT_FILTER_KEYS):
+        return None
+    
+    statement = select(Document.id)
+    if workflow_id is not None:
+        statement = statement.where(Document.workflow_id == workflow_id)
+    if filters.get("document_ids"):
+        statement = statement.where(Document.id.in_([int(i) for i in _as_list(filters["document_ids"])]))
+    if filters.get("embedding_status"):
+        statement = statement.where(Document.embedding_status.in_(_as_list(filters["embedding_status"])))
+    if filters.get("uploaded_after"):
+        statement = statement.where(Document.created_at >= _as_datetime(filters["uploaded_after"]))
+    if filters.get("uploaded_before"):
+        statement = statement.where(Document.created_at < _as_datetime(filters["uploaded_before"]))
+    
+    tags = DocumentTag.normalize(_as_list(filters.get("tags")))
+    if tags:
+        if filters.get("tags_match") == "all":
+            for tag in tags:
+                statement = statement.where(Document.tags.any(DocumentTag.tag == tag))
+        else:
+            statement = statement.where(Document.tags.any(DocumentTag.tag.in_(tags)))
+    return statement
+
+
+def resolve_document_ids(
+    db: Session,
+    filters: Dict[str, Any],
+    workflow_id: Optional[int] = None
+) -> Optional[List[int]]:
+    """Document ids a retrieval may draw from, or None for no restriction.
+    
+    Combines ``document_ids`` with the document-level filters (``tags``,
+    ``uploaded_after``, ``uploaded_before``, ``embedding_status``). Tags match
+    if a document has any of them, or all of them with ``tags_match: "all"``.
+    An empty list means nothing can match.
+    """
+    statement = _document_ids_select(filters, workflow_id)
+    if statement is None:
+        return _explicit_document_ids(filters)
+    return list(db.execute(statement).scalars())
+
+
+async def resolve_document_ids_async(
+    db: AsyncSession,
+    filters: Dict[str, Any],
+    workflow_id: Optional[int] = None
+) -> Optional[List[int]]:
+    """``resolve_document_ids`` for an async session"""
+    statement = _document_ids_select(filters, workflow_id)
+    if statement is None:
+        return _explicit_document_ids(filters)
+    return list((await db.execute(statement)).scalars())
+
+
+def build_where(filters: Dict[str, Any], document_ids: Optional[List[int]]) -> Optional[Dict[str, Any]]:
+    """Chroma ``where`` predicate over chunk metadata"""
+    clauses = []
+    if document_ids is not None:
+        clauses.append({"document_id": {"$in": document_ids}})
+    if filters.get("page_from"):
+        clauses.append({"page": {"$gte": int(filters["page_from"])}})
+    if filters.get("page_to"):
+        clauses.append({"page": {"$lte": int(filters["page_to"])}})
+    
+    if not clauses:
+        return None
+    # Chroma expects a single top-level operator
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def build_where_document(filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Chroma ``where_document`` predicate over chunk text"""
+    clauses = [{"$contains": text} for text in _as_list(filters.get("contains"))]
+    clauses += [{"$not_contains": text} for text in _as_list(filters.get("not_contains"))]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def build_search_filters(
+    db: Session,
+    filters: Optional[Dict[str, Any]],
+    workflow_id: Optional[int] = None
+) -> Optional[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """(where, where_document) for a retrieval, or None if the filters exclude every document"""
+    filters = filters or {}
+    document_ids = resolve_document_ids(db, filters, workflow_id)
+    if document_ids is not None and not document_ids:
+        return None
+    return build_where(filters, document_ids), build_where_document(filters)
+
+
+async def build_search_filters_async(
+    db: AsyncSession,
+    filters: Optional[Dict[str, Any]],
+    workflow_id: Optional[int] = None
+) -> Optional[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """``build_search_filters`` for an async session"""
+    filters = filters or {}
+    document_ids = await resolve_document_ids_async(db, filters, workflow_id)
+    if document_ids is not None and not document_ids:
+        return None
+    return build_where(filters, document_ids), build_where_document(filters)
@@ -1,8 +1,17 @@
 from typing import Dict, Any, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
 from app.models.workflow import Workflow, WorkflowComponent
 from app.services.llm_service import LLMService
 from app.services.embedding_service import EmbeddingService
+from app.services.retrieval_filters import build_search_filters, build_search_filters_async
+from app.core.tracing import traced, set_span_attributes
+from app.services.context_builder import ContextBuilder
+from app.services.providers import provider_registry
+from app.core.config import settings
 import json
 
 
@@ -27,14 +36,31 @@ class WorkflowService:
         db.refresh(workflow)
         return workflow
     
+    async def create_workflow_async(self, db: AsyncSession, name: str, description: str = None) -> Workflow:
+        """Async variant of create_workflow"""
+        workflow = Workflow(name=name, description=description)
+        db.add(workflow)
+        await db.commit()
+        await db.refresh(workflow)
+        return workflow
+    
     def get_workflow(self, db: Session, workflow_id: int) -> Optional[Workflow]:
         """Get workflow by ID"""
         return db.query(Workflow).filter(Workflow.id == workflow_id).first()
     
+    async def get_workflow_async(self, db: AsyncSession, workflow_id: int) -> Optional[Workflow]:
+        """Async variant of get_workflow"""
+        return await db.get(Workflow, workflow_id)
+    
     def get_all_workflows(self, db: Session) -> List[Workflow]:
         """Get all workflows"""
         return db.query(Workflow).filter(Workflow.is_active == True).all()
     
+    async def get_all_workflows_async(self, db: AsyncSession) -> List[Workflow]:
+        """Async variant of get_all_workflows"""
+        result = await db.execute(select(Workflow).where(Workflow.is_active == True))
+        return list(result.scalars())
+    
     def update_workflow(
         self, 
         db: Session, 
@@ -56,16 +82,50 @@ class WorkflowService:
         db.refresh(workflow)
         return workflow
     
+    async def update_workflow_async(
+        self,
+        db: AsyncSession,
+        workflow_id: int,
+        name: str = None,
+        description: str = None
+    ) -> Optional[Workflow]:
+        """Async variant of update_workflow"""
+        workflow = await self.get_workflow_async(db, workflow_id)
+        if not workflow:
+            return None
+        
+        if name:
+            workflow.name = name
+        if description is not None:
+            workflow.description = description
+        
+        await db.commit()
+        await db.refresh(workflow)
+        return workflow
+    
     def delete_workflow(self, db: Session, workflow_id: int) -> bool:
         """Delete workflow"""
         workflow = self.get_workflow(db, workflow_id)
         if not workflow:
             return False
         
+        # Soft delete; the garbage collector purges its data after a grace period
         workflow.is_active = False
+        workflow.deleted_at = func.now()
         db.commit()
         return True
     
+    async def delete_workflow_async(self, db: AsyncSession, workflow_id: int) -> bool:
+        """Async variant of delete_workflow"""
+        workflow = await self.get_workflow_async(db, workflow_id)
+        if not workflow:
+            return False
+        
+        workflow.is_active = False
+        workflow.deleted_at = func.now()
+        await db.commit()
+        return True
+    
     def add_component(
         self, 
         db: Session, 
@@ -93,6 +153,32 @@ class WorkflowService:
         db.refresh(component)
         return component
     
+    async def add_component_async(
+        self,
+        db: AsyncSession,
+        workflow_id: int,
+        component_type: str,
+        position_x: int,
+        position_y: int,
+        configuration: Dict[str, Any] = None
+    ) -> Optional[WorkflowComponent]:
+        """Async variant of add_component"""
+        if not await self.get_workflow_async(db, workflow_id):
+            return None
+        
+        component = WorkflowComponent(
+            workflow_id=workflow_id,
+            component_type=component_type,
+            position_x=position_x,
+            position_y=position_y,
+            configuration=configuration or {}
+        )
+        
+        db.add(component)
+        await db.commit()
+        await db.refresh(component)
+        return component
+    
     def update_component(
         self, 
         db: Session, 
@@ -117,14 +203,48 @@ class WorkflowService:
         db.refresh(component)
         return component
     
+    async def update_component_async(
+        self,
+        db: AsyncSession,
+        component_id: int,
+        configuration: Dict[str, Any] = None,
+        position_x: int = None,
+        position_y: int = None
+    ) -> Optional[WorkflowComponent]:
+        """Async variant of update_component"""
+        component = await db.get(WorkflowComponent, component_id)
+        if not component:
+            return None
+        
+        if configuration is not None:
+            component.configuration = configuration
+        if position_x is not None:
+            component.position_x = position_x
+        if position_y is not None:
+            component.position_y = position_y
+        
+        await db.commit()
+        await db.refresh(component)
+        return component
+    
     def get_workflow_components(self, db: Session, workflow_id: int) -> List[WorkflowComponent]:
         """Get all components for a workflow"""
         return db.query(WorkflowComponent).filter(WorkflowComponent.workflow_id == workflow_id).all()
     
+    async def get_workflow_components_async(self, db: AsyncSession, workflow_id: int) -> List[WorkflowComponent]:
+        """Async variant of get_workflow_components"""
+        result = await db.execute(select(WorkflowComponent).where(WorkflowComponent.workflow_id == workflow_id))
+        return list(result.scalars())
+    
     def validate_workflow(self, db: Session, workflow_id: int) -> Dict[str, Any]:
         """Validate workflow structure and configuration"""
-        components = self.get_workflow_components(db, workflow_id)
-        
+        return self._validate_components(self.get_workflow_components(db, workflow_id))
+    
+    async def validate_workflow_async(self, db: AsyncSession, workflow_id: int) -> Dict[str, Any]:
+        """Async variant of validate_workflow"""
+        return self._validate_components(await self.get_workflow_components_async(db, workflow_id))
+    
+    def _validate_components(self, components: List[WorkflowComponent]) -> Dict[str, Any]:
         # Check if workflow has required components
         component_types = [comp.component_type for comp in components]
         
@@ -155,14 +275,21 @@ class WorkflowService:
                     validation_result["warnings"].append("LLM Engine missing API key")
                 if not config.get("model"):
                     validation_result["warnings"].append("LLM Engine missing model selection")
+                elif config["model"].lower() not in ["gemini", *provider_registry.names()]:
+                    validation_result["warnings"].append(f"LLM Engine provider {config['model']} is not registered, OpenAI will be used")
             
             elif component.component_type == "knowledge_base":
                 config = component.configuration or {}
                 if not config.get("embedding_model"):
                     validation_result["warnings"].append("Knowledge Base missing embedding model")
+                provider = config.get("embedding_provider")
+                if provider and provider_registry.config(provider) is None:
+                    validation_result["errors"].append(f"Knowledge Base embedding provider {provider} is not registered")
+                    validation_result["valid"] = False
         
         return validation_result
     
+    @traced("workflow.execute")
     def execute_workflow(
         self, 
         db: Session, 
@@ -171,11 +298,37 @@ class WorkflowService:
         session_id: str = None
     ) -> Dict[str, Any]:
         """Execute workflow with user query"""
-        # Get workflow components
         components = self.get_workflow_components(db, workflow_id)
         
         # Validate workflow
-        validation = self.validate_workflow(db, workflow_id)
+        validation = self._validate_components(components)
+        if not validation["valid"]:
+            return {
+                "success": False,
+                "error": "Invalid workflow",
+                "validation_errors": validation["errors"]
+            }
+        
+        knowledge_base_comp = next((c for c in components if c.component_type == "knowledge_base"), None)
+        search_filters = None
+        if knowledge_base_comp:
+            config = knowledge_base_comp.configuration or {}
+            search_filters = build_search_filters(db, config.get("filters"), self._filter_workflow_id(config, workflow_id))
+        
+        return self._run_components(components, workflow_id, user_query, search_filters)
+    
+    @traced("workflow.execute")
+    async def execute_workflow_async(
+        self,
+        db: AsyncSession,
+        workflow_id: int,
+        user_query: str,
+        session_id: str = None
+    ) -> Dict[str, Any]:
+        """``execute_workflow`` for an async session"""
+        components = await self.get_workflow_components_async(db, workflow_id)
+        
+        validation = self._validate_components(components)
         if not validation["valid"]:
             return {
                 "success": False,
@@ -183,6 +336,38 @@ class WorkflowService:
                 "validation_errors": validation["errors"]
             }
         
+        knowledge_base_comp = next((c for c in components if c.component_type == "knowledge_base"), None)
+        search_filters = None
+        if knowledge_base_comp:
+            config = knowledge_base_comp.configuration or {}
+            search_filters = await build_search_filters_async(
+                db, config.get("filters"), self._filter_workflow_id(config, workflow_id)
+            )
+        
+        # Retrieval and generation block on the vector store and LLM APIs
+        return await run_in_threadpool(self._run_components, components, workflow_id, user_query, search_filters)
+    
+    def _collection_names(self, config: Dict[str, Any], workflow_id: int) -> List[str]:
+        # A sharded knowledge base lists several collections, searched in parallel
+        return config.get("collection_names") or [config.get("collection_name", f"workflow_{workflow_id}")]
+    
+    def _filter_workflow_id(self, config: Dict[str, Any], workflow_id: int) -> Optional[int]:
+        # Document filters are scoped to the workflow unless a collection may be shared
+        return workflow_id if self._collection_names(config, workflow_id) == [f"workflow_{workflow_id}"] else None
+    
+    def _run_components(
+        self,
+        components: List[WorkflowComponent],
+        workflow_id: int,
+        user_query: str,
+        search_filters: Optional[tuple]
+    ) -> Dict[str, Any]:
+        """Run retrieval and generation for a validated workflow; no database access.
+        
+        ``search_filters`` is the knowledge base's (where, where_document), or
+        None when its filters exclude every document.
+        """
+        set_span_attributes(**{"workflow.id": workflow_id})
         # Find components by type
         user_query_comp = next((c for c in components if c.component_type == "user_query"), None)
         knowledge_base_comp = next((c for c in components if c.component_type == "knowledge_base"), None)
@@ -191,21 +376,51 @@ class WorkflowService:
         
         # Execute workflow
         context = ""
+        context_tokens = 0
         
         # Step 1: Process through Knowledge Base if present
         if knowledge_base_comp:
             config = knowledge_base_comp.configuration or {}
-            collection_name = config.get("collection_name", f"workflow_{workflow_id}")
+            collection_names = self._collection_names(config, workflow_id)
             
-            # Search for relevant context
-            search_results = self.embedding_service.search_similar_documents(
-                collection_name=collection_name,
-                query=user_query,
-                n_results=3
-            )
+            # Search for relevant context, scoped by the knowledge base's filters
+            search_results = []
+            if search_filters is not None:
+                where, where_document = search_filters
+                # Fetch extra candidates; the context builder decides how many fit
+                candidates = int(config.get("candidate_results", settings.context_candidate_results))
+                if len(collection_names) == 1:
+                    search_results = self.embedding_service.search_similar_documents(
+                        collection_name=collection_names[0],
+                        query=user_query,
+                        n_results=candidates,
+                        where=where,
+                        where_document=where_document,
+                        api_key=config.get("api_key")
+                    )
+                else:
+                    search_results = self.embedding_service.search_collections(
+                        collection_names=collection_names,
+                        query=user_query,
+                        n_results=candidates,
+                        where=where,
+                        where_document=where_document,
+                        api_key=config.get("api_key")
+                    )
             
             if search_results:
-                context = "\n".join([result["document"] for result in search_results])
+                llm_config = (llm_comp.configuration or {}) if llm_comp else {}
+                # Token counts follow the target model where tiktoken knows it
+                provider_config = provider_registry.config(llm_config.get("model") or "openai")
+                target_model = llm_config.get("chat_model") or (provider_config or {}).get("chat_model")
+                packed = ContextBuilder(target_model).build(
+                    search_results,
+                    token_budget=config.get("context_token_budget"),
+                    max_distance=config.get("max_distance"),
+                    max_chunks=config.get("n_results")
+                )
+                context = packed["context"]
+                context_tokens = packed["tokens"]
         
         # Step 2: Generate response using LLM
         if llm_comp:
@@ -221,7 +436,9 @@ class WorkflowService:
                 model=model,
                 temperature=temperature,
                 use_web_search=use_web_search,
-                custom_prompt=custom_prompt
+                custom_prompt=custom_prompt,
+                chat_model=config.get("chat_model"),
+                api_key=config.get("api_key")
             )
             
             if "error" in response:
@@ -235,7 +452,8 @@ class WorkflowService:
                 "response": response["response"],
                 "model": response["model"],
                 "usage": response["usage"],
-                "context_used": bool(context)
+                "context_used": bool(context),
+                "context_tokens": context_tokens
             }
         else:
             # No LLM component, return simple response
@@ -244,5 +462,6 @@ class WorkflowService:
                 "response": f"Query received: {user_query}",
                 "model": "simple",
                 "usage": {"total_tokens": len(user_query.split())},
-                "context_used": bool(context)
+                "context_used": bool(context),
+                "context_tokens": context_tokens
             } 
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Deterministic stand-ins for the OpenAI, Gemini and SerpAPI clients.
+
+Each fake sleeps for a fixed latency plus, for completions, the time to
+"generate" its tokens at a given rate, then returns a response shaped like the
+real SDK's. Embeddings are pseudo-random unit vectors seeded by the text, so
+the same text always embeds to the same vector and runs are reproducible.
+"""
+
+import sys
+import time
+import types
+import hashlib
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass
+class ProviderProfile:
+    latency_ms: float = 50.0  # Time to first token / response
+    tokens_per_second: float = 1000.0  # Completion generation rate
+    completion_tokens: int = 64
+    embedding_latency_ms: float = 20.0
+    embedding_dim: int = 256
+    search_latency_ms: float = 100.0
+
+    def sleep_completion(self) -> None:
+        time.sleep(self.latency_ms / 1000 + self.completion_tokens / self.tokens_per_second)
+
+
+def _namespace(**fields):
+    return types.SimpleNamespace(**fields)
+
+
+def fake_embedding(text: str, dim: int) -> list:
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _completion_text(prompt: str, tokens: int) -> str:
+    words = prompt.split()[-8:] or ["answer"]
+    return " ".join(words[i % len(words)] for i in range(tokens))
+
+
+class FakeOpenAI:
+    """``openai.OpenAI`` with ``chat.completions``, ``embeddings`` and ``models``"""
+
+    def __init__(self, profile: ProviderProfile):
+        self.profile = profile
+        self.chat = _namespace(completions=_namespace(create=self._complete))
+        self.embeddings = _namespace(create=self._embed)
+        self.models = _namespace(list=lambda: _namespace(data=[_namespace(id="gpt-4o-mini")]))
+
+    def _complete(self, model, messages, temperature=0.7, max_tokens=1000, **kwargs):
+        self.profile.sleep_completion()
+        prompt = " ".join(message["content"] for message in messages)
+        prompt_tokens = len(prompt.split())
+        completion_tokens = min(self.profile.completion_tokens, max_tokens)
+        return _namespace(
+            choices=[_namespace(message=_namespace(content=_completion_text(prompt, completion_tokens)))],
+            usage=_namespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        )
+
+    def _embed(self, model, input, dimensions=None, **kwargs):
+        time.sleep(self.profile.embedding_latency_ms / 1000)
+        dim = dimensions or self.profile.embedding_dim
+        return _namespace(
+            data=[_namespace(embedding=fake_embedding(text, dim)) for text in input],
+            usage=_namespace(prompt_tokens=sum(len(text.split()) for text in input))
+        )
+
+
+class FakeGeminiModel:
+    """``genai.GenerativeModel`` with ``generate_content``"""
+
+    def __init__(self, profile: ProviderProfile):
+        self.profile = profile
+
+    def generate_content(self, prompt, generation_config=None):
+        self.profile.sleep_completion()
+        return _namespace(text=_completion_text(prompt, self.profile.completion_tokens))
+
+
+def fake_serpapi_module(profile: ProviderProfile) -> types.ModuleType:
+    """A ``serpapi`` module whose ``GoogleSearch`` returns fixed organic results"""
+
+    class GoogleSearch:
+        def __init__(self, params):
+            self.params = params
+
+        def get_dict(self):
+            time.sleep(profile.search_latency_ms / 1000)
+            return {"organic_results": [
+                {"title": f"Result {i} for {self.params['q']}", "snippet": "Snippet text " * 10,
+                 "link": f"https://example.com/{i}", "position": i}
+                for i in range(1, self.params.get("num", 5) + 1)
+            ]}
+
+    module = types.ModuleType("serpapi")
+    module.GoogleSearch = GoogleSearch
+    return module
+
+
+def install(profile: ProviderProfile) -> None:
+    """Route every provider call of the services to the fakes"""
+    from app.services.llm_service import LLMService
+    from app.services.providers import provider_registry
+
+    # Every OpenAI-compatible provider, "openai" included, answers through one fake
+    openai_client = FakeOpenAI(profile)
+    gemini_model = FakeGeminiModel(profile)
+    provider_registry.client = lambda name, api_key=None: openai_client
+    LLMService.gemini_model = property(lambda self: gemini_model)
+    sys.modules["serpapi"] = fake_serpapi_module(profile)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+HNSW parameter sweep for Chroma knowledge base collections.
+
+Builds one Chroma collection per (M, construction_ef, search_ef) combination
+from a sample corpus and reports build time, single-query p50/p99 latency,
+recall@k against brute force, resident memory and index size on disk. Use the
+results to pick ``hnsw_preset`` or the ``hnsw_m`` / ``hnsw_construction_ef`` /
+``hnsw_search_ef`` overrides of a knowledge base.
+
+The corpus is one of:
+  --corpus DIR        PDFs and .txt files, chunked like uploads and embedded
+                      with the configured OpenAI model (embeddings are cached
+                      next to the corpus, so re-runs cost nothing)
+  --vectors-file F    a .npy matrix of embeddings
+  (neither)           synthetic clustered vectors
+
+Queries are held-out chunks. Without a grid, the configured presets are swept.
+
+Usage (from the backend directory):
+    python benchmarks/hnsw_benchmark.py --corpus ./sample_docs --queries 200
+    python benchmarks/hnsw_benchmark.py --size 200000 --m 16 32 --construction-ef 100 200 --search-ef 10 50 100
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import itertools
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store_benchmark import rss_mb, make_vectors, brute_force, add_in_batches, measure
+
+
+def load_corpus_vectors(corpus_dir: str) -> np.ndarray:
+    """Chunk and embed every PDF and .txt file under a directory, caching the matrix"""
+    from app.core.config import settings
+    from app.services.document_service import extract_pdf_pages, chunk_text
+    from app.services.embedding_service import EmbeddingService
+
+    paths = sorted(
+        os.path.join(root, filename)
+        for root, _, filenames in os.walk(corpus_dir)
+        for filename in filenames
+        if filename.lower().endswith(('.pdf', '.txt'))
+    )
+    chunks = []
+    for path in paths:
+        if path.lower().endswith('.pdf'):
+            pages = extract_pdf_pages(path).get("pages", [])
+        else:
+            with open(path, errors="ignore") as f:
+                pages = [f.read()]
+        for page in pages:
+            chunks.extend(chunk_text(page))
+    if not chunks:
+        raise SystemExit(f"No text found under {corpus_dir}")
+
+    key = hashlib.sha256("\0".join(chunks + [settings.openai_embedding_model]).encode()).hexdigest()[:16]
+    cache_path = os.path.join(corpus_dir, f".hnsw_benchmark_{key}.npy")
+    if os.path.exists(cache_path):
+        return np.load(cache_path)
+
+    print(f"Embedding {len(chunks)} chunks from {len(paths)} files")
+    embeddings = EmbeddingService().create_embeddings(chunks)
+    if not embeddings:
+        raise SystemExit("Embedding the corpus failed")
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    np.save(cache_path, vectors)
+    return vectors
+
+
+def dir_mb(path: str) -> float:
+    total = 0
+    for root, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, filename)) for filename in filenames)
+    return total / 1024 ** 2
+
+
+def bench_hnsw(workdir: str, params: dict, vectors, queries, truth, k: int, batch_size: int) -> dict:
+    import chromadb
+    from chromadb.config import Settings
+
+    path = os.path.join(workdir, "chroma_" + "_".join(str(v) for v in params.values()))
+    rss_before = rss_mb()
+    client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+    collection = client.create_collection(
+        "bench",
+        metadata={"hnsw:space": "cosine", **{f"hnsw:{name}": value for name, value in params.items()}}
+    )
+    start = time.perf_counter()
+    add_in_batches(collection, vectors, batch_size)
+    build_seconds = time.perf_counter() - start
+
+    name = "hnsw M={M} construction_ef={construction_ef} search_ef={search_ef}".format(**params)
+    result = measure(name, collection, vectors, queries, truth, k, build_seconds, rss_before)
+    result.update(params)
+    result["disk_mb"] = round(dir_mb(path), 1)
+    client.delete_collection("bench")
+    return result
+
+
+def main():
+    from app.services.embedding_service import HNSW_PRESETS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of PDFs and .txt files to embed")
+    parser.add_argument("--vectors-file", help=".npy matrix of embeddings")
+    parser.add_argument("--size", type=int, default=100000, help="Number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=256, help="Synthetic vector dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--m", type=int, nargs="+", help="M values to sweep")
+    parser.add_argument("--construction-ef", type=int, nargs="+", help="construction_ef values to sweep")
+    parser.add_argument("--search-ef", type=int, nargs="+", help="search_ef values to sweep")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.corpus or args.vectors_file:
+        source = load_corpus_vectors(args.corpus) if args.corpus else np.load(args.vectors_file)
+        source = source.astype(np.float32)
+        source /= np.linalg.norm(source, axis=1, keepdims=True)
+        if len(source) <= args.queries:
+            raise SystemExit(f"Need more than {args.queries} vectors, got {len(source)}")
+        vectors, queries = source[:-args.queries], source[-args.queries:]
+    else:
+        vectors = make_vectors(args.size, args.dim)
+        queries = make_vectors(args.queries, args.dim, seed=1)
+    truth = brute_force(vectors, queries, args.k)
+
+    if args.m or args.construction_ef or args.search_ef:
+        grid = [
+            {"M": m, "construction_ef": construction_ef, "search_ef": search_ef}
+            for m, construction_ef, search_ef in itertools.product(
+                args.m or [16], args.construction_ef or [100], args.search_ef or [10]
+            )
+        ]
+    else:
+        grid = [{"M": 16, "construction_ef": 100, "search_ef": 10}] + list(HNSW_PRESETS.values())
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="hnsw_bench_")
+    try:
+        for params in grid:
+            result = bench_hnsw(workdir, params, vectors, queries, truth, args.k, args.batch_size)
+            results.append(result)
+            print(json.dumps(result))
+            gc.collect()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+End-to-end performance suite: the FastAPI app in-process against fake providers.
+
+Everything runs in this process: the app is served through httpx's ASGI
+transport, OpenAI, Gemini and SerpAPI are replaced by the deterministic fakes
+in ``fake_providers.py``, and the database, Chroma, uploads and caches live in
+a temporary directory (or --database-url, e.g. a scratch PostgreSQL). The
+suite creates a workflow and then measures:
+
+  ingestion   PDF uploads (extraction, chunking, embedding, indexing), pages/sec
+  retrieval   knowledge base searches with distinct queries, QPS and latency
+  chat        chat turns through the workflow, turns/sec and p50/p99 latency
+
+Each phase runs at a fixed concurrency. Results are written as JSON together
+with the git commit and configuration; --compare prints the change against an
+earlier result file.
+
+Usage (from the backend directory):
+    python benchmarks/perf_suite.py --output results.json
+    python benchmarks/perf_suite.py --chat-turns 500 --concurrency 16 --llm-latency-ms 300 --compare results.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ("retrieval augmented generation pipelines combine a vector index with a language model so answers "
+         "cite the uploaded documents workflows route each question through knowledge base search before "
+         "the completion request").split()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def configure_environment(workdir: str, args) -> None:
+    """Point every store at the temporary directory; must run before the app is imported"""
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(workdir, "chroma"),
+        "NUMPY_STORE_DIRECTORY": os.path.join(workdir, "vector_store"),
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "EXTRACTION_CACHE_DIR": "",
+        "OPENAI_API_KEY": "fake",
+        "GOOGLE_API_KEY": "fake",
+        "SERPAPI_KEY": "fake",
+        "GC_INTERVAL_SECONDS": "0",
+        "SQL_ECHO": "False",
+        "TRACING_ENABLED": "False",
+    })
+
+
+def make_pdf(path: str, pages: int, seed: int) -> None:
+    import fitz
+
+    rng = np.random.default_rng(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        text = " ".join(WORDS[i] for i in rng.integers(0, len(WORDS), 350))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def latency_summary(latencies: list, seconds: float, errors: int) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "per_second": round(len(latencies) / seconds, 2) if seconds else 0.0,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if latencies else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2) if latencies else None,
+    }
+
+
+async def run_concurrently(count: int, concurrency: int, request) -> dict:
+    """Call ``request(i)`` for i in range(count) with at most ``concurrency`` in flight"""
+    latencies, errors = [], 0
+    queue = iter(range(count))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            start = time.perf_counter()
+            ok = await request(i)
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_summary(latencies, time.perf_counter() - start, errors)
+
+
+async def run_suite(args, workdir: str) -> dict:
+    import httpx
+    from app.core.database import create_tables
+    import fake_providers
+
+    fake_providers.install(fake_providers.ProviderProfile(
+        latency_ms=args.llm_latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        embedding_latency_ms=args.embedding_latency_ms,
+        embedding_dim=args.embedding_dim,
+        search_latency_ms=args.search_latency_ms
+    ))
+    create_tables()
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        response = await client.post("/api/v1/workflows/", json={"name": "perf suite"})
+        workflow_id = response.json()["id"]
+        components = [
+            ("user_query", {}),
+            ("knowledge_base", {"embedding_model": "text-embedding-3-large", "n_results": 5}),
+            ("llm_engine", {"model": args.model, "api_key": "fake", "use_web_search": args.web_search}),
+            ("output", {}),
+        ]
+        for position, (component_type, configuration) in enumerate(components):
+            await client.post(f"/api/v1/workflows/{workflow_id}/components", json={
+                "component_type": component_type, "position_x": position * 200, "position_y": 0,
+                "configuration": configuration
+            })
+
+        # Ingestion
+        pdf_dir = os.path.join(workdir, "pdfs")
+        os.makedirs(pdf_dir)
+        pdfs = []
+        for i in range(args.documents):
+            path = os.path.join(pdf_dir, f"doc_{i}.pdf")
+            make_pdf(path, args.pages_per_document, seed=i)
+            pdfs.append(path)
+
+        async def upload(i):
+            with open(pdfs[i], "rb") as f:
+                content = f.read()
+            response = await client.post(
+                "/api/v1/documents/upload", params={"workflow_id": workflow_id},
+                files={"file": (os.path.basename(pdfs[i]), content, "application/pdf")}
+            )
+            return response.status_code == 200 and response.json()["embedding_status"] == "completed"
+
+        ingestion = await run_concurrently(args.documents, args.ingest_concurrency, upload)
+        pages = args.documents * args.pages_per_document
+        ingestion["pages"] = pages
+        ingestion["pages_per_second"] = round(pages / ingestion["seconds"], 2) if ingestion["seconds"] else 0.0
+
+        # Retrieval: distinct queries, so every search embeds and queries the index
+        async def search(i):
+            response = await client.post(f"/api/v1/knowledge-bases/workflow_{workflow_id}/search", json={
+                "query": f"{WORDS[i % len(WORDS)]} {WORDS[(i * 7) % len(WORDS)]} question {i}", "n_results": 5
+            })
+            return response.status_code == 200
+
+        retrieval = await run_concurrently(args.searches, args.concurrency, search)
+
+        # Chat turns through the whole workflow
+        async def chat(i):
+            response = await client.post(f"/api/v1/chat/{workflow_id}/send", json={
+                "message": f"What do the documents say about {WORDS[i % len(WORDS)]}? ({i})",
+                "session_id": f"bench-{i % args.sessions}"
+            })
+            return response.status_code == 200
+
+        chat_turns = await run_concurrently(args.chat_turns, args.concurrency, chat)
+
+    return {"ingestion": ingestion, "retrieval": retrieval, "chat": chat_turns}
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print the relative change of each metric against an earlier result file"""
+    print(f"Compared with {baseline.get('commit', 'unknown')[:12]}:", file=sys.stderr)
+    for phase, metrics in current["results"].items():
+        for name, value in metrics.items():
+            before = baseline.get("results", {}).get(phase, {}).get(name)
+            if isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+                print(f"  {phase}.{name}: {before} -> {value} ({(value - before) / before:+.1%})", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to use instead of a temporary SQLite file")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages-per-document", type=int, default=10)
+    parser.add_argument("--ingest-concurrency", type=int, default=4)
+    parser.add_argument("--searches", type=int, default=500)
+    parser.add_argument("--chat-turns", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=20, help="Chat sessions the turns are spread over")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight for retrieval and chat")
+    parser.add_argument("--model", default="openai", choices=["openai", "gemini"])
+    parser.add_argument("--web-search", action="store_true", help="Enable the (fake) SerpAPI step in chat turns")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-second", type=float, default=1000.0)
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0)
+    parser.add_argument("--embedding-dim", type=int, default=256)
+    parser.add_argument("--search-latency-ms", type=float, default=100.0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary directory")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="perf_suite_")
+    configure_environment(workdir, args)
+    try:
+        results = asyncio.run(run_suite(args, workdir))
+    finally:
+        if args.keep:
+            print(f"Kept {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {name: value for name, value in vars(args).items() if name not in ("output", "compare", "keep")},
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: how long importing the API application takes.
+
+Runs ``python -X importtime -c "import main"`` in fresh interpreters and
+reports the median total import time and the slowest top-level imports. The
+provider SDKs and heavy libraries (Chroma, OpenAI, Gemini, SerpAPI, PyMuPDF,
+NumPy, tiktoken) are imported on first use, so none of them may appear.
+
+With --check the script exits non-zero when the median exceeds --budget-ms
+or a deferred module is imported at startup; run it in CI to catch
+regressions.
+
+Usage (from the backend directory):
+    python benchmarks/startup_benchmark.py --runs 5
+    python benchmarks/startup_benchmark.py --check --budget-ms 1500
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported lazily by the services; importing main must not load them
+DEFERRED_MODULES = ["chromadb", "openai", "google.generativeai", "serpapi", "fitz", "numpy", "tiktoken"]
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time in microseconds of every module imported by ``module``"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    times, top_level = {}, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+        # Top-level imports are not indented under another module
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative)
+    return {"modules": times, "top_level": top_level}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to report")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Median import time budget")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if the budget or deferred imports are violated")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals_ms = [sum(run["top_level"].values()) / 1000 for run in runs]
+    last = runs[-1]
+    slowest = sorted(last["top_level"].items(), key=lambda item: -item[1])[:args.top]
+    deferred_imported = [name for name in DEFERRED_MODULES if name in last["modules"]]
+
+    result = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms_median": round(statistics.median(totals_ms), 1),
+        "import_ms_min": round(min(totals_ms), 1),
+        "import_ms_max": round(max(totals_ms), 1),
+        "budget_ms": args.budget_ms,
+        "modules_imported": len(last["modules"]),
+        "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest],
+        "deferred_imported": deferred_imported,
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.check:
+        failures = []
+        if result["import_ms_median"] > args.budget_ms:
+            failures.append(f"median import time {result['import_ms_median']}ms exceeds {args.budget_ms}ms")
+        if deferred_imported:
+            failures.append(f"imported at startup: {', '.join(deferred_imported)}")
+        if failures:
+            print("Startup budget check failed: " + "; ".join(failures), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Vector store benchmark: memory-mapped NumPy store vs ChromaDB.
+
+Builds a collection at each size and reports build time, single-query p50/p99
+latency, recall@k against exact full-dimension brute force, resident memory
+and the size of the in-memory index relative to float32 at full dimension.
+Chroma is skipped if it is not installed.
+
+NumPy dtypes float32, float16 and int8 (quantized with exact re-rank) are
+measured. --truncate-dim simulates requesting shorter embeddings through the
+``dimensions`` parameter (text-embedding-3 vectors are truncated and
+re-normalised); use --vectors-file with real embeddings for meaningful recall,
+synthetic vectors do not concentrate information in leading dimensions.
+
+Usage (from the backend directory):
+    python benchmarks/vector_store_benchmark.py --sizes 10000 100000 1000000 --dim 256
+    python benchmarks/vector_store_benchmark.py --vectors-file embeddings.npy --truncate-dim 256 --dtypes int8
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import importlib.util
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.numpy_vector_store import NumpyVectorStore
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def make_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 1000, 8), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def truncate(vectors: np.ndarray, dim: int) -> np.ndarray:
+    truncated = np.ascontiguousarray(vectors[:, :dim])
+    return truncated / np.linalg.norm(truncated, axis=1, keepdims=True)
+
+
+def brute_force(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    top = []
+    for query in queries:
+        scores = vectors @ query
+        part = np.argpartition(-scores, k - 1)[:k]
+        top.append(part[np.argsort(-scores[part])])
+    return np.array(top)
+
+
+def add_in_batches(collection, vectors: np.ndarray, batch_size: int) -> None:
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        collection.add(
+            ids=[str(i) for i in range(start, start + len(batch))],
+            embeddings=batch.tolist(),
+            metadatas=[{"document_id": i % 100} for i in range(start, start + len(batch))]
+        )
+
+
+def measure(name: str, collection, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int,
+            build_seconds: float, rss_before: float) -> dict:
+    # Warm up so the first query's page faults don't skew the percentiles
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k)
+    
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=["distances"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+    
+    return {
+        "backend": name,
+        "vectors": len(vectors),
+        "dim": vectors.shape[1],
+        "build_seconds": round(build_seconds, 2),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "query_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        f"recall@{k}": round(hits / (len(queries) * k), 4),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+
+
+def bench_numpy(workdir: str, dtype: str, vectors, queries, truth, k: int, batch_size: int,
+                rerank_factor: int, full_dim: int) -> dict:
+    rss_before = rss_mb()
+    store = NumpyVectorStore(os.path.join(workdir, f"numpy_{dtype}"), dtype=dtype, rerank_factor=rerank_factor)
+    collection = store.get_or_create_collection("bench")
+    start = time.perf_counter()
+    add_in_batches(collection, vectors, batch_size)
+    build_seconds = time.perf_counter() - start
+    result = measure(f"numpy-{dtype}", collection, vectors, queries, truth, k, build_seconds, rss_before)
+    # The mapped matrix searched on every query; int8 keeps its full vectors on disk for re-ranking only
+    index_bytes = len(vectors) * vectors.shape[1] * np.dtype(dtype).itemsize
+    result["index_mb"] = round(index_bytes / 1024 ** 2, 1)
+    result["index_reduction_vs_float32_full_dim"] = round(len(vectors) * full_dim * 4 / index_bytes, 1)
+    store.delete_collection("bench")
+    return result
+
+
+def bench_chroma(workdir: str, vectors, queries, truth, k: int, batch_size: int) -> dict:
+    import chromadb
+    from chromadb.config import Settings
+    
+    rss_before = rss_mb()
+    client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"), settings=Settings(anonymized_telemetry=False))
+    collection = client.get_or_create_collection("bench", metadata={"hnsw:space": "cosine"})
+    start = time.perf_counter()
+    add_in_batches(collection, vectors, min(batch_size, 5000))
+    build_seconds = time.perf_counter() - start
+    result = measure("chroma", collection, vectors, queries, truth, k, build_seconds, rss_before)
+    client.delete_collection("bench")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("--rerank-factor", type=int, default=4, help="int8 shortlist size as a multiple of k")
+    parser.add_argument("--truncate-dim", type=int, help="Store and query only the first N dimensions")
+    parser.add_argument("--vectors-file", help=".npy matrix of real embeddings; the last --queries rows are queries")
+    parser.add_argument("--skip-chroma", action="store_true")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    has_chroma = not args.skip_chroma
+    if has_chroma and importlib.util.find_spec("chromadb") is None:
+        print("chromadb not installed, skipping Chroma")
+        has_chroma = False
+    
+    results = []
+    workdir = tempfile.mkdtemp(prefix="vector_bench_")
+    try:
+        source = None
+        if args.vectors_file:
+            source = np.load(args.vectors_file).astype(np.float32)
+            source /= np.linalg.norm(source, axis=1, keepdims=True)
+        
+        for size in args.sizes:
+            if source is not None:
+                size = min(size, len(source) - args.queries)
+                vectors, queries = source[:size], source[-args.queries:]
+            else:
+                vectors = make_vectors(size, args.dim)
+                queries = make_vectors(args.queries, args.dim, seed=1)
+            full_dim = vectors.shape[1]
+            
+            # Ground truth is always exact search at full dimension
+            truth = brute_force(vectors, queries, args.k)
+            if args.truncate_dim:
+                vectors, queries = truncate(vectors, args.truncate_dim), truncate(queries, args.truncate_dim)
+            
+            runs = [lambda dtype=dtype: bench_numpy(workdir, dtype, vectors, queries, truth, args.k, args.batch_size,
+                                                    args.rerank_factor, full_dim)
+                    for dtype in args.dtypes]
+            if has_chroma:
+                runs.append(lambda: bench_chroma(workdir, vectors, queries, truth, args.k, args.batch_size))
+            
+            for run in runs:
+                result = run()
+                results.append(result)
+                print(json.dumps(result))
+                gc.collect()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, Base
-from app.api.endpoints import workflow_router, document_router, chat_router, llm_router
+from app.core.database import async_engine, SessionLocal, create_tables, replica_router
+from app.api.endpoints import workflow_router, document_router, chat_router, llm_router, knowledge_base_router, admin_router
 from app.core.config import settings
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from app.core.metrics import MetricsMiddleware, register_collectors, generate_latest, CONTENT_TYPE_LATEST
+from app.core.tracing import TracingMiddleware, configure_tracing
+from app.core.profiling import ProfilingMiddleware, ContinuousProfiler
+from app.services.providers import provider_registry
 
 # Create FastAPI app
 app = FastAPI(
@@ -23,13 +26,105 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "X-Written-At"],
 )
 
+# Record request latency per route; sees the routes included below
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+register_collectors()
+
+# Server span per request, its trace id returned in X-Trace-Id. Only with
+# tracing enabled: the no-op tracer has no trace ids to return
+if configure_tracing():
+    app.add_middleware(TracingMiddleware, routes=app.router.routes)
+
+# Admin-requested profiles of single requests (X-Profile with X-Admin-Token)
+if settings.admin_token:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(workflow_router, prefix="/api/v1")
 app.include_router(document_router, prefix="/api/v1")
 app.include_router(chat_router, prefix="/api/v1")
 app.include_router(llm_router, prefix="/api/v1")
+app.include_router(knowledge_base_router, prefix="/api/v1")
+app.include_router(admin_router, prefix="/api/v1")
+
+
+def run_garbage_collection():
+    """One garbage collection pass with its own session"""
+    from app.services.gc_service import GarbageCollectionService
+    
+    db = SessionLocal()
+    try:
+        stats = GarbageCollectionService().run(db)
+        if stats["workflows"] or stats["compacted"]:
+            print(f"Garbage collection: {stats}")
+    except Exception as e:
+        print(f"Error running garbage collection: {e}")
+    finally:
+        db.close()
+
+
+async def garbage_collection_loop():
+    while True:
+        await asyncio.sleep(settings.gc_interval_seconds)
+        await run_in_threadpool(run_garbage_collection)
+
+
+@app.on_event("startup")
+async def create_database_tables():
+    # At startup rather than import, so tooling that imports the app stays fast
+    if settings.create_tables_on_startup:
+        await run_in_threadpool(create_tables)
+
+
+@app.on_event("startup")
+async def start_garbage_collection():
+    if settings.gc_interval_seconds > 0:
+        app.state.gc_task = asyncio.create_task(garbage_collection_loop())
+
+
+async def replica_lag_loop():
+    while True:
+        await run_in_threadpool(replica_router.refresh_lag)
+        await asyncio.sleep(settings.replica_lag_check_seconds)
+
+
+@app.on_event("startup")
+async def start_replica_lag_checks():
+    if replica_router.engines:
+        app.state.replica_lag_task = asyncio.create_task(replica_lag_loop())
+
+
+@app.on_event("startup")
+async def start_continuous_profiling():
+    if settings.continuous_profiling_hz > 0:
+        app.state.continuous_profiler = ContinuousProfiler()
+        app.state.continuous_profiler.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for name in ("gc_task", "replica_lag_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    
+    profiler = getattr(app.state, "continuous_profiler", None)
+    if profiler:
+        profiler.stop()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+@app.on_event("shutdown")
+async def close_provider_clients():
+    provider_registry.close()
 
 
 @app.get("/")
@@ -43,6 +138,12 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of this worker process"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
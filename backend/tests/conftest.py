@@ -0,0 +1,37 @@
+import zlib
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services import embedding_service as embedding_module
+from app.services.embedding_service import EmbeddingService
+from app.services.retrieval_cache import CollectionVersions
+
+EMBEDDING_DIM = 16
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    """A fixed vector per text, standing in for a provider's embedding"""
+    return np.random.default_rng(zlib.crc32(text.encode())).standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+
+@pytest.fixture
+def embedding_service(tmp_path, monkeypatch):
+    """An EmbeddingService on NumPy collections under tmp_path, embedding with ``fake_embedding``.
+    
+    ``embedding_service.embedded`` lists the texts sent for embedding.
+    """
+    monkeypatch.setattr(settings, "chroma_persist_directory", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "numpy_store_directory", str(tmp_path / "vector_store"))
+    monkeypatch.setattr(settings, "vector_backend", "numpy")
+    monkeypatch.setattr(embedding_module, "collection_versions", CollectionVersions(str(tmp_path / "chroma")))
+    monkeypatch.setattr(embedding_module, "_collection_handles", {})
+    
+    service = EmbeddingService()
+    service.embedded = []
+    
+    def create_embeddings(texts, *args, **kwargs):
+        service.embedded.extend(texts)
+        return [fake_embedding(text).tolist() for text in texts]
+    
+    monkeypatch.setattr(service, "create_embeddings", create_embeddings)
+    return service
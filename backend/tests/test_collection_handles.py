@@ -0,0 +1,66 @@
+import numpy as np
+from app.core.config import settings
+from app.services.numpy_vector_store import NumpyCollection
+from app.services.retrieval_cache import CollectionVersions
+from conftest import fake_embedding
+
+COLLECTION = "workflow_1"
+
+
+def add_chunks(service, document_id: int, count: int):
+    texts = [f"document {document_id} chunk {i}" for i in range(count)]
+    assert service.add_documents_to_collection(
+        collection_name=COLLECTION,
+        documents=texts,
+        metadatas=[{"document_id": document_id} for _ in texts],
+        ids=[f"doc_{document_id}_{i}" for i in range(count)],
+        collection_config={"vector_backend": "numpy"}
+    )
+    return texts
+
+
+def test_own_writes_keep_the_cached_count(embedding_service, monkeypatch):
+    add_chunks(embedding_service, 1, 5)
+    add_chunks(embedding_service, 2, 3)
+    collection = embedding_service.get_collection(COLLECTION)
+    assert embedding_service.get_collection(COLLECTION) is collection
+    assert embedding_service.get_collection_info(COLLECTION)["count"] == 8
+    
+    def count():
+        raise AssertionError("count should be served from the cache")
+    
+    monkeypatch.setattr(collection, "count", count)
+    assert embedding_service.delete_document_vectors(COLLECTION, 2) == 3
+    assert embedding_service.get_collection(COLLECTION) is collection
+    assert embedding_service.get_collection_info(COLLECTION)["count"] == 5
+
+
+def test_write_by_another_process_invalidates_the_handle(embedding_service):
+    texts = add_chunks(embedding_service, 1, 5)
+    assert embedding_service.get_collection_info(COLLECTION)["count"] == 5
+    
+    # Another worker writes through its own handle and bumps the shared version
+    other = NumpyCollection(embedding_service.get_collection(COLLECTION).path, COLLECTION)
+    other_texts = [f"other chunk {i}" for i in range(4)]
+    other.add(
+        ids=[f"doc_2_{i}" for i in range(4)],
+        embeddings=[fake_embedding(text).tolist() for text in other_texts],
+        metadatas=[{"document_id": 2} for _ in other_texts]
+    )
+    CollectionVersions(settings.chroma_persist_directory).bump(COLLECTION)
+    
+    assert embedding_service.get_collection_info(COLLECTION)["count"] == 9
+    all_ids = [f"doc_1_{i}" for i in range(5)] + [f"doc_2_{i}" for i in range(4)]
+    matrix = np.array([fake_embedding(text) for text in texts + other_texts])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = fake_embedding(other_texts[0])
+    expected = [all_ids[i] for i in np.argsort(-(matrix @ (query / np.linalg.norm(query))))[:3]]
+    
+    result = embedding_service.get_collection(COLLECTION).query(query_embeddings=[query.tolist()], n_results=3)
+    assert result["ids"][0] == expected
+
+
+def test_missing_collection_is_not_created(embedding_service):
+    assert embedding_service.get_collection_info("workflow_404") is None
+    assert embedding_service.delete_document_vectors("workflow_404", 1) == 0
+    assert not embedding_service.numpy_store.has_collection("workflow_404")
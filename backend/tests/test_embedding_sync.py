@@ -0,0 +1,62 @@
+import hashlib
+import numpy as np
+from conftest import fake_embedding
+
+COLLECTION = "workflow_1"
+NUMPY = {"vector_backend": "numpy"}
+
+
+def chunk_id(document_id: int, text: str) -> str:
+    return f"doc_{document_id}_{hashlib.sha256(text.encode()).hexdigest()[:16]}"
+
+
+def sync(service, document_id: int, texts):
+    return service.sync_document_chunks(
+        collection_name=COLLECTION,
+        document_ids=[document_id],
+        documents=list(texts),
+        metadatas=[{"document_id": document_id} for _ in texts],
+        ids=[chunk_id(document_id, text) for text in texts],
+        collection_config=NUMPY
+    )
+
+
+def stored_ids(service, document_id: int) -> set:
+    collection = service.get_collection(COLLECTION)
+    return set(collection.get(where={"document_id": document_id}, include=[])["ids"])
+
+
+def test_resync_embeds_only_changed_chunks(embedding_service):
+    assert sync(embedding_service, 1, ["alpha", "beta", "gamma"]) == {"added": 3, "removed": 0, "unchanged": 0}
+    assert sync(embedding_service, 2, ["other"]) == {"added": 1, "removed": 0, "unchanged": 0}
+    embedding_service.embedded.clear()
+    
+    assert sync(embedding_service, 1, ["alpha", "beta", "delta"]) == {"added": 1, "removed": 1, "unchanged": 2}
+    assert embedding_service.embedded == ["delta"]
+    assert stored_ids(embedding_service, 1) == {chunk_id(1, text) for text in ("alpha", "beta", "delta")}
+    # Chunks of documents outside the sync are left alone
+    assert stored_ids(embedding_service, 2) == {chunk_id(2, "other")}
+
+
+def test_unchanged_resync_is_a_no_op(embedding_service):
+    sync(embedding_service, 1, ["alpha", "beta"])
+    embedding_service.embedded.clear()
+    
+    assert sync(embedding_service, 1, ["alpha", "beta"]) == {"added": 0, "removed": 0, "unchanged": 2}
+    assert embedding_service.embedded == []
+
+
+def test_synced_chunks_search_like_brute_force(embedding_service):
+    texts = [f"chunk {i}" for i in range(50)]
+    sync(embedding_service, 1, texts[:40])
+    sync(embedding_service, 1, texts[10:])
+    
+    live = texts[10:]
+    matrix = np.array([fake_embedding(text) for text in live])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = fake_embedding("query")
+    query /= np.linalg.norm(query)
+    expected = [chunk_id(1, live[i]) for i in np.argsort(-(matrix @ query))[:5]]
+    
+    result = embedding_service.get_collection(COLLECTION).query(query_embeddings=[query.tolist()], n_results=5)
+    assert result["ids"][0] == expected
@@ -0,0 +1,10 @@
+from prometheus_client import REGISTRY
+from app.core.metrics import register_collectors
+
+
+def test_collectors_register_once_per_process():
+    # main registers them on import; rebuilding the app must not duplicate them
+    register_collectors()
+    register_collectors()
+    
+    assert REGISTRY.get_sample_value("retrieval_cache", {"stat": "hits"}) is not None
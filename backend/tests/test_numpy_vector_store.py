@@ -0,0 +1,163 @@
+import os
+import fcntl
+import threading
+import numpy as np
+import pytest
+from app.services import numpy_vector_store
+from app.services.numpy_vector_store import NumpyVectorStore, NumpyCollection
+
+DIM = 32
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Small blocks, so queries merge top-k results across several of them
+    monkeypatch.setattr(numpy_vector_store, "QUERY_BLOCK_ROWS", 300)
+    return NumpyVectorStore(str(tmp_path / "vector_store"))
+
+
+def random_vectors(rows: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((rows, DIM)).astype(np.float32)
+
+
+def fill(collection, vectors: np.ndarray) -> list:
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+    for start in range(0, len(vectors), 500):
+        collection.add(
+            ids=ids[start:start + 500],
+            embeddings=vectors[start:start + 500].tolist(),
+            metadatas=[{"parity": i % 2} for i in range(start, min(start + 500, len(vectors)))]
+        )
+    return ids
+
+
+def brute_force(vectors: np.ndarray, ids: list, queries: np.ndarray, k: int):
+    """Top-k ids and cosine distances by exhaustive search"""
+    matrix = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = normalized @ matrix.T
+    order = np.argsort(-scores, axis=1)[:, :k]
+    return (
+        [[ids[i] for i in row] for row in order],
+        [[1.0 - scores[q, i] for i in row] for q, row in enumerate(order)]
+    )
+
+
+def assert_matches(result, expected_ids, expected_distances):
+    assert result["ids"] == expected_ids
+    np.testing.assert_allclose(np.array(result["distances"]), np.array(expected_distances), atol=1e-5)
+
+
+def test_query_matches_brute_force(store):
+    vectors, queries = random_vectors(2000, 0), random_vectors(5, 1)
+    collection = store.create_collection("kb")
+    ids = fill(collection, vectors)
+    
+    result = collection.query(query_embeddings=queries.tolist(), n_results=10)
+    assert_matches(result, *brute_force(vectors, ids, queries, 10))
+
+
+def test_filtered_query_matches_brute_force(store):
+    vectors, queries = random_vectors(1000, 2), random_vectors(3, 3)
+    collection = store.create_collection("kb")
+    ids = fill(collection, vectors)
+    
+    even = np.arange(0, 1000, 2)
+    result = collection.query(query_embeddings=queries.tolist(), n_results=10, where={"parity": 0})
+    assert_matches(result, *brute_force(vectors[even], [ids[i] for i in even], queries, 10))
+
+
+def test_deleted_rows_are_masked(store):
+    vectors, queries = random_vectors(1000, 4), random_vectors(5, 5)
+    collection = store.create_collection("kb")
+    ids = fill(collection, vectors)
+    
+    deleted = set(range(0, 1000, 3))
+    collection.delete(ids=[ids[i] for i in sorted(deleted)])
+    live = [i for i in range(1000) if i not in deleted]
+    
+    assert collection.count() == len(live)
+    result = collection.query(query_embeddings=queries.tolist(), n_results=10)
+    assert_matches(result, *brute_force(vectors[live], [ids[i] for i in live], queries, 10))
+
+
+def test_compaction_is_seen_by_other_processes(store):
+    vectors, queries = random_vectors(1200, 6), random_vectors(5, 7)
+    collection = store.create_collection("kb")
+    ids = fill(collection, vectors)
+    collection.delete(ids=ids[::2])
+    live = list(range(1, 1200, 2))
+    expected = brute_force(vectors[live], [ids[i] for i in live], queries, 10)
+    
+    # Another process's view of the same collection, with the old files mapped
+    other = NumpyCollection(collection.path, collection.name)
+    assert_matches(other.query(query_embeddings=queries.tolist(), n_results=10), *expected)
+    
+    collection.compact()
+    
+    assert os.path.getsize(collection._file("deleted.bin")) == len(live)
+    assert_matches(other.query(query_embeddings=queries.tolist(), n_results=10), *expected)
+    assert_matches(collection.query(query_embeddings=queries.tolist(), n_results=10), *expected)
+    np.testing.assert_allclose(
+        other.get(ids=[ids[1]], include=["embeddings"])["embeddings"][0],
+        vectors[1] / np.linalg.norm(vectors[1]),
+        atol=1e-6
+    )
+
+
+def test_compaction_waits_for_readers(store):
+    vectors = random_vectors(500, 8)
+    collection = store.create_collection("kb")
+    ids = fill(collection, vectors)
+    collection.delete(ids=ids[:250])
+    
+    # A reader in another process holds swap.lock shared
+    with open(collection._file("swap.lock"), "w") as reader:
+        fcntl.flock(reader, fcntl.LOCK_SH)
+        compaction = threading.Thread(target=collection.compact)
+        compaction.start()
+        compaction.join(timeout=0.5)
+        assert compaction.is_alive()
+        assert collection._header["rows"] == 500
+        fcntl.flock(reader, fcntl.LOCK_UN)
+    compaction.join(timeout=10)
+    
+    assert not compaction.is_alive()
+    assert collection._header["rows"] == 250
+    assert collection.get(include=[])["ids"] == ids[250:]
+
+
+def test_int8_scales_are_calibrated_on_the_first_batch(store):
+    vectors = random_vectors(500, 9)
+    collection = store.create_collection("kb", metadata={"numpy:dtype": "int8"})
+    fill(collection, vectors)
+    
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.testing.assert_allclose(collection._header["scales"], np.abs(normalized).max(axis=0) / 127, rtol=1e-6)
+    
+    # Later outliers are clipped in the quantized matrix but kept exactly in full.bin
+    outlier = np.zeros(DIM, dtype=np.float32)
+    outlier[0] = 1.0
+    collection.add(ids=["outlier"], embeddings=[outlier.tolist()])
+    assert collection._vectors[500, 0] == 127
+    np.testing.assert_allclose(collection.get(ids=["outlier"], include=["embeddings"])["embeddings"][0], outlier)
+
+
+def test_int8_rerank_recall(store):
+    vectors, queries = random_vectors(3000, 10), random_vectors(20, 11)
+    collection = store.create_collection("kb", metadata={"numpy:dtype": "int8"})
+    ids = fill(collection, vectors)
+    
+    result = collection.query(query_embeddings=queries.tolist(), n_results=10)
+    expected_ids, _ = brute_force(vectors, ids, queries, 10)
+    recall = np.mean([len(set(got) & set(want)) / 10 for got, want in zip(result["ids"], expected_ids)])
+    assert recall >= 0.95
+    
+    # Re-ranking uses the full vectors, so the distances returned are exact
+    matrix = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    index = {chunk_id: i for i, chunk_id in enumerate(ids)}
+    for q, (hit_ids, distances) in enumerate(zip(result["ids"], result["distances"])):
+        exact = [1.0 - float(matrix[index[hit]] @ normalized[q]) for hit in hit_ids]
+        np.testing.assert_allclose(distances, exact, atol=1e-5)
+        assert distances == sorted(distances)
@@ -0,0 +1,55 @@
+from app.services.retrieval_cache import CollectionVersions, RetrievalCache
+
+
+def test_versions_follow_bumps_from_another_process(tmp_path):
+    # Two instances on one directory stand in for two worker processes
+    reader, writer = CollectionVersions(str(tmp_path)), CollectionVersions(str(tmp_path))
+    assert reader.get("kb") == 0
+    
+    # Back-to-back bumps usually share an mtime tick; each must still be seen
+    for expected in range(1, 6):
+        assert writer.bump("kb") == expected
+        assert reader.get("kb") == expected
+    assert reader.get("other") == 0
+    assert reader.bump("kb") == 6
+    assert writer.get("kb") == 6
+
+
+def test_bump_makes_cached_results_unreachable(tmp_path):
+    versions, cache = CollectionVersions(str(tmp_path)), RetrievalCache(max_entries=10)
+    cache.set(cache.make_key("kb", versions.get("kb"), "What is RAG?", 5), [{"id": "a"}], cost_ms=12.0)
+    
+    assert cache.get(cache.make_key("kb", versions.get("kb"), "  what is   rag?", 5)) == [{"id": "a"}]
+    CollectionVersions(str(tmp_path)).bump("kb")
+    assert cache.get(cache.make_key("kb", versions.get("kb"), "What is RAG?", 5)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert cache.stats()["saved_ms"] == 12.0
+
+
+def test_cache_returns_copies():
+    cache = RetrievalCache(max_entries=10)
+    results = [{"id": "a", "distance": 0.1}]
+    cache.set(("kb", 0, "q", 5), results, cost_ms=1.0)
+    results[0]["id"] = "changed"
+    
+    hit = cache.get(("kb", 0, "q", 5))
+    hit[0]["source"] = "annotated"
+    assert cache.get(("kb", 0, "q", 5)) == [{"id": "a", "distance": 0.1}]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RetrievalCache(max_entries=2)
+    cache.set(("a",), [], cost_ms=1.0)
+    cache.set(("b",), [], cost_ms=1.0)
+    cache.get(("a",))
+    cache.set(("c",), [], cost_ms=1.0)
+    
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == [] and cache.get(("c",)) == []
+
+
+def test_disabled_cache_stores_nothing():
+    cache = RetrievalCache(max_entries=0)
+    cache.set(("a",), [{"id": "a"}], cost_ms=1.0)
+    assert cache.get(("a",)) is None
+    assert cache.stats()["entries"] == 0
@@ -40,7 +40,7 @@ const ComponentConfig = ({ component, onUpdate }) => {
   const fetchDocuments = async () => {
     try {
       const response = await documentAPI.getDocuments();
-      setDocuments(response.data);
+      setDocuments(response.data.items);
     } catch (error) {
       console.error('Error fetching documents:', error);
     }
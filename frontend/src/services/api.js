@@ -18,6 +18,11 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    // Lets any backend worker serve our recent chat writes back to us
+    const writtenAt = sessionStorage.getItem('writtenAt');
+    if (writtenAt) {
+      config.headers['X-Written-At'] = writtenAt;
+    }
     return config;
   },
   (error) => {
@@ -27,7 +32,12 @@ api.interceptors.request.use(
 
 // Response interceptor
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    if (response.headers['x-written-at']) {
+      sessionStorage.setItem('writtenAt', response.headers['x-written-at']);
+    }
+    return response;
+  },
   (error) => {
     if (error.response?.status === 401) {
       // Handle unauthorized access
@@ -84,9 +94,12 @@ export const documentAPI = {
     });
   },
 
-  // Get documents
-  getDocuments: (workflowId = null) => {
-    const params = workflowId ? { workflow_id: workflowId } : {};
+  // Get a page of documents; pass the previous page's next_cursor as cursor
+  getDocuments: (workflowId = null, { cursor = null, limit = 50, embeddingStatus = null } = {}) => {
+    const params = { limit };
+    if (workflowId) params.workflow_id = workflowId;
+    if (cursor) params.cursor = cursor;
+    if (embeddingStatus) params.embedding_status = embeddingStatus;
     return api.get('/documents', { params });
   },
 
@@ -2,10 +2,15 @@
 """
 GenAI Stack - Startup Script
 This script helps you start the backend server and provides setup instructions.
+
+Usage:
+    python start.py                                  Set up and start the backend
+    python start.py ingest --workflow 12 ./corpus/   Bulk-ingest a directory of PDFs
 """
 
 import os
 import sys
+import argparse
 import subprocess
 import platform
 
@@ -124,7 +129,64 @@ def start_backend():
     except Exception as e:
         print(f"❌ Error starting server: {e}")
 
+def run_ingest(args):
+    """Ingest a directory of PDFs straight into a workflow's knowledge base"""
+    corpus_dir = os.path.abspath(args.path)
+    manifest_path = os.path.abspath(args.manifest) if args.manifest else None
+    if not os.path.isdir(corpus_dir):
+        print(f"❌ Not a directory: {corpus_dir}")
+        sys.exit(1)
+    
+    # Run from the backend directory so .env and relative paths resolve like the server
+    os.chdir("backend")
+    sys.path.insert(0, os.getcwd())
+    
+    from app.core.database import SessionLocal, create_tables
+    from app.services.ingest_service import IngestService
+    
+    create_tables()
+    
+    print(f"📚 Ingesting {corpus_dir} into workflow {args.workflow}...")
+    ingest_service = IngestService(workers=args.workers, batch_size=args.batch_size)
+    db = SessionLocal()
+    try:
+        stats = ingest_service.ingest_directory(
+            db=db,
+            workflow_id=args.workflow,
+            corpus_dir=corpus_dir,
+            manifest_path=manifest_path
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    
+    print(f"✅ Ingested {stats['ingested']} files, skipped {stats['skipped']}, failed {stats['failed']} "
+          f"in {stats['elapsed']:.1f}s")
+    if stats["failed"]:
+        sys.exit(1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="GenAI Stack startup and maintenance commands")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    ingest_parser = subparsers.add_parser("ingest", help="Bulk-ingest a directory of PDFs into a workflow")
+    ingest_parser.add_argument("path", help="Directory to walk for PDF files")
+    ingest_parser.add_argument("--workflow", type=int, required=True, help="Workflow ID to ingest into")
+    ingest_parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    ingest_parser.add_argument("--batch-size", type=int, default=512, help="Chunks embedded and written per batch")
+    ingest_parser.add_argument("--manifest", default=None,
+                               help="Resume manifest path (default: under backend/ingest_manifests)")
+    
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.command == "ingest":
+        run_ingest(args)
+        return
+    
     print_banner()
     
     # Check Python version